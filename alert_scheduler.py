@@ -0,0 +1,145 @@
+"""
+Priority scheduling of alert re-checks.
+
+Checking every watched route on a fixed interval wastes quota on flights months
+out whose fares barely move. AlertScheduler keeps one heap entry per watched
+route group (alert_worker.RouteKey), ordered by when that route is next due.
+Each check reschedules the route after refresh_interval():
+- the base interval grows with days to departure, from MIN_INTERVAL for
+  imminent flights up to MAX_INTERVAL;
+- it shrinks as the route's price volatility grows (the coefficient of
+  variation of its past flight_results check prices).
+
+A global token bucket caps upstream checks at ALERT_QUOTA_PER_MINUTE. Routes
+that are due but over quota stay at the top of the heap for the next tick.
+
+    $ python alert_scheduler.py
+"""
+import heapq
+import itertools
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from alert_worker import evaluate_alerts, load_active_alerts
+from create_db import FlightResult, SessionLocal, init_db
+from rate_limit import TokenBucket
+
+ALERT_QUOTA_PER_MINUTE = int(os.getenv("ALERT_QUOTA_PER_MINUTE", "30"))
+ALERT_TICK_SECONDS = float(os.getenv("ALERT_TICK_SECONDS", "30"))
+MIN_INTERVAL = timedelta(minutes=int(os.getenv("ALERT_MIN_INTERVAL_MINUTES", "15")))
+MAX_INTERVAL = timedelta(hours=int(os.getenv("ALERT_MAX_INTERVAL_HOURS", "24")))
+INTERVAL_PER_DAY = timedelta(minutes=20)  # added per day until departure
+VOLATILITY_WEIGHT = 10.0  # a 10% price spread halves the interval
+VOLATILITY_LOOKBACK = timedelta(days=14)
+
+
+def refresh_interval(days_to_departure, volatility=None):
+    """How long to wait before re-checking a route (a timedelta between MIN and MAX_INTERVAL)."""
+    interval = MIN_INTERVAL + INTERVAL_PER_DAY * max(days_to_departure, 0)
+    if volatility:
+        interval = interval / (1 + VOLATILITY_WEIGHT * volatility)
+    return min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+
+
+def price_volatility(session, groups, keys, since, chunk_size=900):
+    """{RouteKey: coefficient of variation of past check prices} (keys with < 2 checks are left out)."""
+    key_of = {search_id: key for key in keys for search_id in groups[key]["search_ids"]}
+    search_ids = list(key_of)
+    prices = {}
+    for start in range(0, len(search_ids), chunk_size):  # stays under SQLite's bound-parameter limit
+        rows = session.execute(
+            select(FlightResult.search_id, func.min(FlightResult.price))
+            .where(FlightResult.search_id.in_(search_ids[start:start + chunk_size]))
+            .where(FlightResult.retrieved_at >= since)
+            .group_by(FlightResult.search_id, FlightResult.retrieved_at)  # one cheapest price per check
+        )
+        for search_id, price in rows:
+            prices.setdefault(key_of[search_id], []).append(price)
+    return {key: statistics.pstdev(values) / statistics.fmean(values)
+            for key, values in prices.items() if len(values) > 1 and statistics.fmean(values) > 0}
+
+
+class AlertScheduler:
+    """Heap of watched routes ordered by next-due time, drained under a per-minute quota."""
+
+    def __init__(self, session_factory=SessionLocal, quota_per_minute=ALERT_QUOTA_PER_MINUTE, provider_names=None):
+        self.session_factory = session_factory
+        self.provider_names = provider_names
+        self.quota = TokenBucket(rate=quota_per_minute / 60, capacity=quota_per_minute)
+        self._heap = []  # (due_at, departure_date, seq, key)
+        self._due_at = {}  # key -> due_at of its live heap entry
+        self._seq = itertools.count()
+        self.stats = {"ticks": 0, "checked": 0, "triggered": 0, "over_quota": 0}
+
+    def _push(self, key, due_at):
+        self._due_at[key] = due_at
+        heapq.heappush(self._heap, (due_at, key.departure_date, next(self._seq), key))
+
+    def sync(self, groups, now):
+        """Schedules newly watched routes right away and forgets routes nobody watches anymore."""
+        for key in groups:
+            if key not in self._due_at:
+                self._push(key, now)
+        for key in list(self._due_at):
+            if key not in groups:
+                del self._due_at[key]  # its heap entry is skipped when popped
+
+    def pop_due(self, now):
+        """Due routes, most overdue first, up to the remaining quota."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, _, _, key = self._heap[0]
+            if self._due_at.get(key) != due_at:
+                heapq.heappop(self._heap)  # stale entry (rescheduled or no longer watched)
+                continue
+            if not self.quota.try_acquire():
+                self.stats["over_quota"] += 1
+                break  # ✅ Stays on top of the heap for the next tick
+            heapq.heappop(self._heap)
+            due.append(key)
+        return due
+
+    def next_due(self):
+        return self._heap[0][0] if self._heap else None
+
+    def tick(self, now=None):
+        """Checks every route that is due (within quota) and reschedules it."""
+        now = now or datetime.now(timezone.utc)
+        self.stats["ticks"] += 1
+        with self.session_factory() as session:
+            groups = load_active_alerts(session, now.date())
+        self.sync(groups, now)
+        due = self.pop_due(now)
+        if not due:
+            return []
+
+        result = evaluate_alerts(self.session_factory, self.provider_names, keys=due, max_calls=len(due),
+                                 now=now, groups=groups)
+        self.stats["checked"] += result["fetched"]
+        self.stats["triggered"] += result["triggered"]
+
+        with self.session_factory() as session:
+            volatility = price_volatility(session, groups, due, now - VOLATILITY_LOOKBACK)
+        for key in due:
+            days = (key.departure_date - now.date()).days
+            self._push(key, now + refresh_interval(days, volatility.get(key)))
+        return due
+
+    def run_forever(self, tick_seconds=ALERT_TICK_SECONDS):
+        while True:
+            try:
+                checked = self.tick()
+                if checked:
+                    print(f"🔔 Checked {len(checked)} routes; {self.stats}")
+            except Exception as e:
+                print(f"❌ Alert scheduler tick failed: {e}")
+            time.sleep(tick_seconds)
+
+
+if __name__ == "__main__":
+    init_db()
+    AlertScheduler().run_forever()
@@ -0,0 +1,222 @@
+"""
+Price-drop / availability alert evaluation.
+
+Each cycle, evaluate_alerts() does the following:
+1. Loads every active alert (not yet triggered, departure not passed) as plain
+   rows and groups them by search parameters (route, dates, cabin, passengers,
+   currency), so a re-check is priced like the search its last price came from.
+2. Fetches each distinct group once, however many users watch it. At most
+   max_calls groups are fetched per cycle, soonest departure first. Fetches go
+   through a bounded pool; booking_api charges the shared RapidAPI token bucket.
+3. Compares each group's cheapest price with its last known price, which is the
+   latest flight_results batch of any search in the group.
+4. In one transaction, stores the new cheapest offers as that batch and marks
+   the triggered alerts, with price_change = new price - last price.
+No DB session is open during step 2: alerts are loaded and the results written
+in two short sessions around the upstream fan-out.
+
+Run it as a worker process:
+    $ python alert_worker.py            # every ALERT_CYCLE_SECONDS
+    $ python alert_worker.py --once     # a single cycle
+Set FLIGHT_PROVIDERS=fake to evaluate against the offline FakeProvider.
+"""
+import os
+import sys
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy import func, or_, select, update
+
+from create_db import Alert, FlightResult, FlightSearch, SessionLocal, User, init_db
+from persistence import save_flight_results
+from providers import COMPLETE, search_providers
+
+ALERT_CYCLE_SECONDS = int(os.getenv("ALERT_CYCLE_SECONDS", "900"))
+ALERT_MAX_CALLS = int(os.getenv("ALERT_MAX_CALLS", "500"))  # upstream searches per cycle
+ALERT_WORKERS = int(os.getenv("ALERT_WORKERS", "8"))
+ALERT_DROP_THRESHOLD = float(os.getenv("ALERT_DROP_THRESHOLD", "0.0"))  # fraction, e.g. 0.05 = 5% cheaper
+ALERT_RESULTS_KEPT = int(os.getenv("ALERT_RESULTS_KEPT", "5"))  # cheapest offers stored per check
+ALERT_CABIN_CLASS = os.getenv("ALERT_CABIN_CLASS", "ECONOMY")  # for searches saved without a cabin_class
+DEFAULT_CURRENCY = "USD"
+
+PRICE_DROP = "Price Drop"
+AVAILABILITY_CHANGE = "Availability Change"
+
+RouteKey = namedtuple("RouteKey", "origin destination departure_date return_date cabin_class adults children currency")
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def load_active_alerts(session, today=None):
+    """{RouteKey: {"alerts": [(alert_id, alert_type)], "search_ids": set()}} for untriggered alerts."""
+    today = today or datetime.now(timezone.utc).date()
+    rows = session.execute(
+        select(Alert.alert_id, Alert.alert_type, FlightSearch.search_id, FlightSearch.origin,
+               FlightSearch.destination, FlightSearch.departure_date, FlightSearch.return_date,
+               FlightSearch.cabin_class, FlightSearch.adults, FlightSearch.children,
+               func.coalesce(FlightSearch.currency, User.currency))
+        .join(FlightSearch, Alert.search_id == FlightSearch.search_id)
+        .join(User, Alert.user_id == User.user_id)
+        .where(or_(Alert.alert_triggered.is_(False), Alert.alert_triggered.is_(None)))
+        .where(FlightSearch.departure_date >= datetime.combine(today, datetime.min.time()))
+        .execution_options(yield_per=5000)  # ✅ Stream rows; 100k alerts never become ORM objects
+    )
+    groups = defaultdict(lambda: {"alerts": [], "search_ids": set()})
+    for alert_id, alert_type, search_id, origin, destination, departure, ret, cabin_class, adults, children, \
+            currency in rows:
+        # Searches saved before these columns existed fall back to 1 adult and the owner's currency
+        key = RouteKey(origin.upper(), destination.upper(), _as_date(departure), _as_date(ret),
+                       (cabin_class or ALERT_CABIN_CLASS).upper(), adults or 1, children or 0,
+                       currency or DEFAULT_CURRENCY)
+        groups[key]["alerts"].append((alert_id, alert_type))
+        groups[key]["search_ids"].add(search_id)
+    return dict(groups)
+
+
+def last_known_prices(session, search_ids, chunk_size=900):
+    """{search_id: (retrieved_at, cheapest price)} from each search's latest flight_results batch."""
+    search_ids = list(search_ids)
+    known = {}
+    for start in range(0, len(search_ids), chunk_size):  # stays under SQLite's bound-parameter limit
+        chunk = search_ids[start:start + chunk_size]
+        latest = (select(FlightResult.search_id, func.max(FlightResult.retrieved_at).label("retrieved_at"))
+                  .where(FlightResult.search_id.in_(chunk))
+                  .group_by(FlightResult.search_id)
+                  .subquery())
+        rows = session.execute(
+            select(FlightResult.search_id, latest.c.retrieved_at, func.min(FlightResult.price))
+            .join(latest, (FlightResult.search_id == latest.c.search_id)
+                  & (FlightResult.retrieved_at == latest.c.retrieved_at))
+            .group_by(FlightResult.search_id, latest.c.retrieved_at)
+        )
+        known.update((search_id, (retrieved_at, price)) for search_id, retrieved_at, price in rows)
+    return known
+
+
+def group_last_price(group, known):
+    """The most recently observed cheapest price among the group's searches (None if never priced)."""
+    observed = [known[search_id] for search_id in group["search_ids"] if search_id in known]
+    return max(observed, key=lambda item: item[0])[1] if observed else None
+
+
+def route_query(key):
+    return {
+        "from_loc": key.origin,
+        "to_loc": key.destination,
+        "depart_date": key.departure_date,
+        "return_date": key.return_date,
+        "currency": key.currency,
+        "adults": key.adults,
+        "children": key.children,
+        "cabin_class": key.cabin_class,
+    }
+
+
+def fetch_routes(keys, provider_names=None, max_workers=ALERT_WORKERS):
+    """{RouteKey: cheapest offers} for every key every provider answered in full (other keys are left out)."""
+    def task(key):
+        status = {}
+        try:
+            offers = search_providers(route_query(key), provider_names, status=status)
+        except Exception as e:
+            print(f"⚠️ Alert check failed for {key.origin}→{key.destination} {key.departure_date}: {e}")
+            return key, None
+        incomplete = sorted(name for name, outcome in status.items() if outcome != COMPLETE)
+        if incomplete:
+            # ✅ A timed-out or partial answer is not "sold out" and must not become the last known price
+            print(f"⚠️ Alert check incomplete for {key.origin}→{key.destination} {key.departure_date}: "
+                  f"{', '.join(f'{name} {status[name]}' for name in incomplete)}")
+            return key, None
+        return key, sorted(offers, key=lambda offer: offer.price)[:ALERT_RESULTS_KEPT]
+
+    results = {}
+    if keys:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as pool:
+            for key, offers in pool.map(task, keys):
+                if offers is not None:
+                    results[key] = offers
+    return results
+
+
+def is_triggered(alert_type, last_price, new_price, threshold=ALERT_DROP_THRESHOLD):
+    """Price Drop: cheaper than the last price by more than threshold. Availability Change: sold out."""
+    if alert_type == AVAILABILITY_CHANGE:
+        return last_price is not None and new_price is None
+    if alert_type == PRICE_DROP:
+        return last_price is not None and new_price is not None and new_price < last_price * (1 - threshold)
+    return False
+
+
+def evaluate_alerts(session_factory=SessionLocal, provider_names=None, keys=None, max_calls=ALERT_MAX_CALLS,
+                    max_workers=ALERT_WORKERS, now=None, groups=None):
+    """Runs one alert cycle; returns counters for logging.
+
+    keys limits the cycle to those groups; otherwise the max_calls groups departing
+    soonest are checked. groups (from load_active_alerts) skips reloading the alerts.
+    """
+    now = now or datetime.now(timezone.utc)
+    stats = {"alerts": 0, "groups": 0, "fetched": 0, "failed": 0, "deferred": 0, "triggered": 0}
+    if groups is None:
+        with session_factory() as session:
+            groups = load_active_alerts(session, now.date())
+    stats["alerts"] = sum(len(group["alerts"]) for group in groups.values())
+    stats["groups"] = len(groups)
+    due = sorted((key for key in (keys if keys is not None else groups) if key in groups),
+                 key=lambda key: key.departure_date)
+    due = due[:max_calls]  # ✅ Upstream calls per cycle are bounded, not proportional to alerts
+    stats["deferred"] = len(groups) - len(due)
+
+    # ✅ No session (or pooled connection) is held while the upstream searches run
+    fetched = fetch_routes(due, provider_names, max_workers)
+    stats["fetched"] = len(fetched)
+    stats["failed"] = len(due) - len(fetched)
+
+    with session_factory() as session:
+        search_ids = [search_id for key in fetched for search_id in groups[key]["search_ids"]]
+        known = last_known_prices(session, search_ids)
+
+        updates = []
+        for key, offers in fetched.items():
+            group = groups[key]
+            last_price = group_last_price(group, known)
+            new_price = offers[0].price if offers else None
+            for alert_id, alert_type in group["alerts"]:
+                if is_triggered(alert_type, last_price, new_price):
+                    updates.append({
+                        "alert_id": alert_id,
+                        "alert_triggered": True,
+                        "triggered_at": now,
+                        "price_change": None if last_price is None or new_price is None else new_price - last_price,
+                    })
+            if offers:
+                # This check becomes the group's last known price for the next cycle
+                save_flight_results(session, min(group["search_ids"]), offers, retrieved_at=now)
+
+        if updates:
+            session.execute(update(Alert), updates)  # ✅ One executemany UPDATE by primary key
+        session.commit()
+    stats["triggered"] = len(updates)
+    return stats
+
+
+def run_forever(interval=ALERT_CYCLE_SECONDS):
+    while True:
+        started = time.monotonic()
+        try:
+            stats = evaluate_alerts()
+            print(f"🔔 Alert cycle: {stats}")
+        except Exception as e:
+            print(f"❌ Alert cycle failed: {e}")
+        time.sleep(max(interval - (time.monotonic() - started), 0))
+
+
+if __name__ == "__main__":
+    init_db()
+    if "--once" in sys.argv[1:]:
+        print(f"🔔 Alert cycle: {evaluate_alerts()}")
+    else:
+        run_forever()
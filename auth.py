@@ -1,11 +1,12 @@
 import streamlit as st
 from datetime import datetime, timedelta,timezone
 from flask import Flask, request, jsonify, session
-from sqlalchemy.orm import sessionmaker
-from create_db import engine, User, SessionLocal
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import scoped_session, sessionmaker
+from create_db import engine, init_db, User, SessionLocal
+from search_service import search_bp
+from passwords import PasswordPoolBusy, hash_in_pool, hash_password, verify, verify_in_pool
+from profile_cache import profile_cache
 import os
-import hashlib
 import bcrypt
 from functools import wraps
 
@@ -19,43 +20,55 @@ def login_required(f):
 
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", "your_secret_key")  # For session management
+app.register_blueprint(search_bp)  # ✅ POST /search, GET /search/<job_id>
 
 # Create DB session
+init_db()  # ✅ Creates missing tables once per process
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-session = SessionLocal()
+# ✅ One DB session per request thread; closed (and its connection returned to the pool)
+# when the app context tears down, even if the view raised
+db_session = scoped_session(SessionLocal)
+
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    db_session.remove()
+
+PASSWORD_RETRY_AFTER = os.getenv("PASSWORD_RETRY_AFTER", "2")  # seconds, sent with 503s
+
+def password_pool_busy():
+    """Login/registration bursts beyond the hashing pool get a retryable 503, not a 500."""
+    response = jsonify({"error": "Too many login attempts right now, please retry shortly"})
+    response.headers["Retry-After"] = PASSWORD_RETRY_AFTER
+    return response, 503
 
 @app.route("/profile", methods=["GET"])
 def get_profile():
     """Retrieve the user's profile preferences."""
-    
-    db_session = SessionLocal()  # ✅ Create a proper DB session
 
     # First, check if the user is authenticated via session
     user_email = session.get("user_email")  # Flask session
 
     # If session-based authentication fails, allow user_id parameter
     if not user_email:
-        user_id = request.args.get("user_id")  # Try getting user_id from URL
+        user_id = request.args.get("user_id", type=int)  # Try getting user_id from URL
         if not user_id:
-            db_session.close()
             return jsonify({"error": "Unauthorized - No session or user_id"}), 401
 
-        user = db_session.query(User).filter_by(user_id=user_id).first()
+        # ✅ Served from the profile cache; the DB is only read on a miss
+        user = profile_cache.get(user_id, load=lambda: db_session.query(User).filter_by(user_id=user_id).first())
     else:
-        user = db_session.query(User).filter_by(email=user_email).first()
+        user = profile_cache.get(email=user_email,
+                                 load=lambda: db_session.query(User).filter_by(email=user_email).first())
 
     if not user:
-        db_session.close()
         return jsonify({"error": "User not found"}), 404
 
-    # ✅ Close DB session after fetching user
     profile_data = {
-        "email": user.email,
-        "flight_type": user.flight_type or "Any",
-        "currency": user.currency or "USD",
-        "market": user.market or "US"
+        "email": user["email"],
+        "flight_type": user["flight_type"] or "Any",
+        "currency": user["currency"] or "USD",
+        "market": user["market"] or "US"
     }
-    db_session.close()
 
     return jsonify(profile_data)
 
@@ -65,22 +78,26 @@ def update_profile():
         return jsonify({"error": "Unauthorized access"}), 401
     
     data = request.json
-    session_db = SessionLocal()
-    user = session_db.query(User).filter_by(email=session["user_email"]).first()
+    user = db_session.query(User).filter_by(email=session["user_email"]).first()
     
     if not user:
-        session_db.close()
         return jsonify({"error": "User not found"}), 404
     
     user.currency = data.get("currency", user.currency)
     user.flight_type = data.get("flight_type", user.flight_type)
     user.market = data.get("market", user.market)
 
-    session_db.commit()
-    session_db.close()
+    db_session.commit()
+    profile_cache.set(user)  # ✅ Write-through: the next GET sees the new preferences
     
     return jsonify({"message": "Profile updated successfully!"})
 
+@app.route("/profile/cache_stats", methods=["GET"])
+@login_required  # ✅ Signed-in users only
+def profile_cache_stats():
+    """Hit/miss counters of this process's profile cache."""
+    return jsonify(profile_cache.snapshot())
+
 st.title("🔑 User Login / Sign Up")
 
 # ✅ Step 1: Check if User is Already Logged In
@@ -100,8 +117,14 @@ with login_tab:
     password = st.text_input("Password", type="password", key="login_password")
 
     if st.button("Log In"):
-        user = session.query(User).filter_by(email=email).first()
-        if user and user.password_hash == hashlib.sha256(password.encode()).hexdigest():
+        with SessionLocal() as db:
+            user = db.query(User).filter_by(email=email).first()
+        matches, stale = verify(user.password_hash, password) if user else (False, False)
+        if matches:
+            if stale:  # ✅ Upgrade legacy sha256 / old-cost hashes on successful login
+                with SessionLocal() as db:
+                    db.query(User).filter_by(user_id=user.user_id).update({"password_hash": hash_password(password)})
+                    db.commit()
             st.success("✅ Login successful!")
             st.session_state["user_email"] = email  # ✅ Store user session
             st.rerun()
@@ -114,15 +137,15 @@ with signup_tab:
     new_password = st.text_input("Password", type="password", key="signup_password")
 
     if st.button("Sign Up"):
-        existing_user = session.query(User).filter_by(email=new_email).first()
-        if existing_user:
-            st.error("❌ Email already exists. Try logging in.")
-        else:
-            hashed_password = hashlib.sha256(new_password.encode()).hexdigest()
-            new_user = User(email=new_email, password_hash=hashed_password, full_name="New User")
-            session.add(new_user)
-            session.commit()
-            st.success("✅ Account created successfully! You can now log in.")
+        with SessionLocal() as db:  # ✅ Short-lived session per action, closed on exit
+            existing_user = db.query(User).filter_by(email=new_email).first()
+            if existing_user:
+                st.error("❌ Email already exists. Try logging in.")
+            else:
+                new_user = User(email=new_email, password_hash=hash_password(new_password), full_name="New User")
+                db.add(new_user)
+                db.commit()
+                st.success("✅ Account created successfully! You can now log in.")
 
 # 🚀 User Registration Endpoint
 @app.route("/register", methods=["POST"])
@@ -134,17 +157,17 @@ def register():
 
     print(f"🚀 Received registration request: {data}")  # Debugging print
 
-    # ✅ Create a new SQLAlchemy session
-    db_session = SessionLocal()
-
     # Check if user already exists
     existing_user = db_session.query(User).filter_by(email=email).first()
     if existing_user:
-        db_session.close()
         return jsonify({"error": "User already exists"}), 400
+    db_session.close()  # ✅ No connection held while waiting for the hashing pool
 
-    # Hash password
-    hashed_password = generate_password_hash(password)
+    # Hash password (on the bounded hashing pool, not this request thread)
+    try:
+        hashed_password = hash_in_pool(password)
+    except PasswordPoolBusy:
+        return password_pool_busy()
 
     # ✅ Create new user
     new_user = User(email=email, password_hash=hashed_password, full_name=full_name)
@@ -152,29 +175,37 @@ def register():
     # ✅ Add user to session and commit
     db_session.add(new_user)
     db_session.commit()
-    db_session.close()
 
     return jsonify({"message": "User registered successfully!"}), 200
 
 # 🚀 User Login Endpoint
-from flask import session  # ✅ Ensure Flask session is imported
-
 @app.route("/login", methods=["POST"])
 def login():
     data = request.get_json()
     email = data.get("email")
     password = data.get("password")
 
-    db_session = SessionLocal()  # ✅ Create a SQLAlchemy session
     user = db_session.query(User).filter_by(email=email).first()
-
-    if user and user.check_password(password):
+    user_id, stored_hash = (user.user_id, user.password_hash) if user else (None, None)
+    db_session.close()  # ✅ Return the connection to the pool while the password is hashed
+    try:
+        matches, stale = verify_in_pool(stored_hash, password) if user_id else (False, False)
+        new_hash = hash_in_pool(password) if matches and stale else None
+    except PasswordPoolBusy:
+        return password_pool_busy()
+
+    if matches:
+        if new_hash:  # ✅ Transparent rehash when the hash format or work factor changed
+            # Only replaces the hash that was verified (a concurrent password change wins)
+            db_session.query(User).filter_by(user_id=user_id, password_hash=stored_hash) \
+                .update({"password_hash": new_hash})
+            db_session.commit()
         # ✅ Explicitly return user_id in JSON response
-        session["user_id"] = user.user_id  # ✅ Store user_id in Flask session
+        session["user_id"] = user_id  # ✅ Store user_id in Flask session
 
         return jsonify({
             "message": "Login successful",
-            "user_id": user.user_id  # ✅ Explicitly send `user_id`
+            "user_id": user_id  # ✅ Explicitly send `user_id`
         }), 200
     else:
         return jsonify({"error": "Invalid credentials"}), 401
@@ -185,39 +216,5 @@ def logout():
     session.pop("user_id", None)  # Remove user session
     return jsonify({"message": "Logged out successfully"}), 200
 
-# 🚀 Get/Update User Profile
-@app.route("/profile", methods=["GET", "PUT"])
-def profile():
-    user_id = session.get("user_id")  # ✅ Try getting from session
-    if not user_id:
-        user_id = request.args.get("user_id")  # ✅ Try getting from request (for debugging)
-
-    if not user_id:
-        return jsonify({"error": "Unauthorized - No session or user_id"}), 401
-
-
-    session_db = SessionLocal()
-    user = session_db.query(User).filter_by(user_id=user_id).first()
-
-    if request.method == "GET":
-        session_db.close()
-        return jsonify({
-            "email": user.email,
-            "full_name": user.full_name,
-            "flight_type": user.flight_type,
-            "currency": user.currency,
-            "market": user.market,
-        })
-
-    if request.method == "PUT":
-        data = request.json
-        user.flight_type = data.get("flight_type", user.flight_type)
-        user.currency = data.get("currency", user.currency)
-        user.market = data.get("market", user.market)
-        
-        session_db.commit()
-        session_db.close()
-        return jsonify({"message": "Profile updated successfully"}), 200
-
 if __name__ == "__main__":
     app.run(debug=True)
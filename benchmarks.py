@@ -0,0 +1,575 @@
+"""
+Micro-benchmarks for the search, parsing and persistence paths.
+
+Usage:
+    $ python benchmarks.py                 # run every benchmark
+    $ python benchmarks.py bulk_insert     # run one benchmark by name
+"""
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+def sample_payload(n_offers=500, round_trip=True, seed=42):
+    """Builds a searchFlights-shaped response with n_offers synthetic offers."""
+    rnd = random.Random(seed)
+    carriers = [("AC", "Air Canada"), ("CA", "Air China"), ("HU", "Hainan Airlines"), ("UA", "United Airlines")]
+
+    def segment(origin, destination, day):
+        stops = rnd.choice([0, 0, 1, 1, 2])
+        code, name = rnd.choice(carriers)
+        departure = datetime(2025, 3, day, rnd.randint(0, 23), rnd.choice([0, 15, 30, 45]))
+        total_time = rnd.randint(11, 30) * 3600 + rnd.randint(0, 59) * 60
+        return {
+            "departureAirport": {"code": origin, "cityName": origin},
+            "arrivalAirport": {"code": destination, "cityName": destination},
+            "departureTime": departure.strftime("%Y-%m-%dT%H:%M:%S"),
+            "arrivalTime": (departure + timedelta(seconds=total_time)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "totalTime": total_time,
+            "legs": [{
+                "carriersData": [{"name": name, "code": code,
+                                  "logo": f"https://r-xx.bstatic.com/data/airlines_logo/{code}.png"}],
+                "flightInfo": {"flightNumber": rnd.randint(1, 999), "carrierInfo": {"marketingCarrier": code}},
+            } for _ in range(stops + 1)],
+            "travellerCheckedLuggage": [{"travellerReference": "1",
+                                         "luggageAllowance": {"maxPiece": rnd.randint(0, 2)}}],
+            "travellerCabinLuggage": [{"travellerReference": "1",
+                                       "luggageAllowance": {"maxPiece": 1}}],
+        }
+
+    offers = []
+    for i in range(n_offers):
+        segments = [segment("YVR", "PEK", 5)]
+        if round_trip:
+            segments.append(segment("PEK", "YVR", 25))
+        offers.append({
+            "token": f"d6a1f_{i}",
+            "segments": segments,
+            "priceBreakdown": {"total": {"currencyCode": "USD", "units": rnd.randint(600, 3000),
+                                         "nanos": rnd.randint(0, 99) * 10_000_000}},
+        })
+    return {"status": True, "message": "Success", "data": {"flightOffers": offers}}
+
+
+def timed(fn, repeat=3):
+    """Returns the best wall-clock time of fn() over `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_bulk_insert():
+    """ORM session.add() per offer vs one Core executemany, per search."""
+    from create_db import FlightResult, FlightSearch, init_db
+    from offer_normalizer import iter_flight_offers, normalize_offers
+    from persistence import offer_to_row, save_flight_results
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        init_db(engine)
+        Session = sessionmaker(bind=engine)
+
+        with Session() as session:
+            search = FlightSearch(user_id=1, origin="YVR", destination="PEK",
+                                  departure_date=datetime(2025, 3, 5), trip_type="Round-trip")
+            session.add(search)
+            session.commit()
+            search_id = search.search_id
+
+        print(f"{'offers':>8} {'orm add (ms)':>14} {'bulk (ms)':>12} {'speedup':>9}")
+        for n in (10, 100, 1000):
+            offers = list(normalize_offers(iter_flight_offers(sample_payload(n))))
+
+            def orm_add():
+                with Session() as session:
+                    for offer in offers:
+                        session.add(FlightResult(**offer_to_row(offer, search_id)))
+                    session.commit()
+
+            def bulk():
+                with Session() as session:
+                    save_flight_results(session, search_id, offers)
+                    session.commit()
+
+            orm_time, bulk_time = timed(orm_add), timed(bulk)
+            print(f"{n:>8} {orm_time * 1000:>14.2f} {bulk_time * 1000:>12.2f} {orm_time / bulk_time:>8.1f}x")
+        engine.dispose()
+
+
+def _sqlite_worker(url, tuned, role, ops, results):
+    """One process of the concurrency benchmark (a Flask or Streamlit worker)."""
+    from sqlalchemy import func, select
+    from sqlalchemy.exc import OperationalError
+    from create_db import FlightSearch, make_engine
+
+    engine = make_engine(url, tuned=tuned)
+    Session = sessionmaker(bind=engine)
+    errors = 0
+    latencies = []
+    for i in range(ops):
+        start = time.perf_counter()
+        try:
+            with Session() as session:
+                if role == "writer":
+                    session.add(FlightSearch(user_id=1, origin="YVR", destination="PEK",
+                                             departure_date=datetime(2025, 3, 5), trip_type="One-way"))
+                    session.commit()
+                else:
+                    session.execute(select(func.count()).select_from(FlightSearch)).scalar()
+        except OperationalError:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    engine.dispose()
+    results.put((role, errors, latencies))
+
+
+def bench_sqlite_concurrency(writers=4, readers=4, ops=300):
+    """Writer/reader processes on one SQLite file: default engine vs tuned make_engine()."""
+    import multiprocessing
+    from create_db import init_db, make_engine
+
+    print(f"{'profile':>8} {'ops/s':>8} {'locked errors':>14} {'p99 write (ms)':>15} {'p99 read (ms)':>14}")
+    for tuned in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            setup_engine = make_engine(url, tuned=tuned)
+            init_db(setup_engine)
+            setup_engine.dispose()
+
+            results = multiprocessing.Queue()
+            roles = ["writer"] * writers + ["reader"] * readers
+            processes = [multiprocessing.Process(target=_sqlite_worker, args=(url, tuned, role, ops, results))
+                         for role in roles]
+            start = time.perf_counter()
+            for process in processes:
+                process.start()
+            outcomes = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+            elapsed = time.perf_counter() - start
+
+            errors = sum(outcome[1] for outcome in outcomes)
+            p99 = {}
+            for role in ("writer", "reader"):
+                latencies = sorted(l for outcome in outcomes if outcome[0] == role for l in outcome[2])
+                p99[role] = latencies[int(len(latencies) * 0.99)] * 1000
+            print(f"{'tuned' if tuned else 'default':>8} {len(roles) * ops / elapsed:>8.0f} {errors:>14} "
+                  f"{p99['writer']:>15.2f} {p99['reader']:>14.2f}")
+
+
+def bench_db_init(runs=5):
+    """Cold import of create_db (fresh interpreter) and the per-rerun cost of init_db()."""
+    import subprocess
+    from create_db import Base, init_db, make_engine
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        def cold(statement):
+            times = []
+            for _ in range(runs):
+                output = subprocess.run(
+                    [sys.executable, "-c",
+                     f"import time; s = time.perf_counter(); {statement}; print(time.perf_counter() - s)"],
+                    cwd=tmp, env={**os.environ, "PYTHONPATH": here}, capture_output=True, text=True, check=True)
+                times.append(float(output.stdout.strip().splitlines()[-1]))
+            return sorted(times)[len(times) // 2]
+
+        deps = cold("import sqlalchemy.orm, werkzeug.security")
+        print(f"cold import create_db:   {cold('import create_db') * 1000:8.2f} ms "
+              f"(sqlalchemy + werkzeug alone: {deps * 1000:.2f} ms)")
+
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        init_db(engine)
+        rerun_create_all = timed(lambda: Base.metadata.create_all(engine), repeat=20)
+        rerun_init_db = timed(lambda: init_db(engine), repeat=20)
+        print(f"per-rerun create_all():  {rerun_create_all * 1000:8.3f} ms")
+        print(f"per-rerun init_db():     {rerun_init_db * 1000:8.3f} ms")
+        engine.dispose()
+
+
+def bench_indexes(rows=int(os.getenv("BENCH_ROWS", "5000000")), repeat=5):
+    """Route/date, result-by-search and alert-by-user queries before and after migrate()."""
+    from sqlalchemy import text
+    from create_db import Base, make_engine, migrate
+
+    searches, alerts, routes, users = max(rows // 10, 1), max(rows // 25, 1), 20, 10000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            # Start from the old schema: only primary keys are indexed
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+            start = time.perf_counter()
+            connection.execute(text(f"""
+                WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq WHERE x < {searches})
+                INSERT INTO flight_search (user_id, origin, destination, departure_date, trip_type, created_at)
+                SELECT x % {users} + 1, printf('O%02d', x % {routes}), printf('D%02d', (x / {routes}) % {routes}),
+                       datetime('2025-01-01', '+' || (x % 365) || ' days'), 'One-way',
+                       datetime('2024-06-01', '+' || (x % 100000) || ' minutes')
+                FROM seq"""))
+            connection.execute(text(f"""
+                WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq WHERE x < {rows})
+                INSERT INTO flight_results (search_id, airline, price, duration, stops, retrieved_at, created_at)
+                SELECT abs(random()) % {searches} + 1, 'Air Canada', 400 + abs(random()) % 2600, '12h 00m',
+                       x % 3, datetime('2024-06-01', '+' || (x % 100000) || ' minutes'),
+                       datetime('2024-06-01', '+' || (x % 100000) || ' minutes')
+                FROM seq"""))
+            connection.execute(text(f"""
+                WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq WHERE x < {alerts})
+                INSERT INTO alerts (user_id, search_id, alert_type, alert_triggered)
+                SELECT x % {users} + 1, abs(random()) % {searches} + 1, 'Price Drop', x % 2 FROM seq"""))
+            print(f"loaded {searches:,} searches, {rows:,} results, {alerts:,} alerts "
+                  f"in {time.perf_counter() - start:.1f} s")
+
+        rnd = random.Random(7)
+        queries = {
+            "route/date recent searches": ("""
+                SELECT search_id, created_at FROM flight_search
+                WHERE origin = :o AND destination = :d AND departure_date = :day
+                ORDER BY created_at DESC LIMIT 20""",
+                lambda: {"o": f"O{rnd.randrange(routes):02d}", "d": f"D{rnd.randrange(routes):02d}",
+                         "day": f"2025-01-{rnd.randint(1, 28):02d} 00:00:00"}),
+            "results by search": ("""
+                SELECT price, retrieved_at FROM flight_results WHERE search_id = :s""",
+                lambda: {"s": rnd.randint(1, searches)}),
+            "route price history (join)": ("""
+                SELECT min(r.price), max(r.retrieved_at) FROM flight_search s
+                JOIN flight_results r ON r.search_id = s.search_id
+                WHERE s.origin = :o AND s.destination = :d AND s.departure_date = :day""",
+                lambda: {"o": f"O{rnd.randrange(routes):02d}", "d": f"D{rnd.randrange(routes):02d}",
+                         "day": f"2025-01-{rnd.randint(1, 28):02d} 00:00:00"}),
+            "active alerts by user": ("""
+                SELECT alert_id, search_id FROM alerts WHERE user_id = :u AND alert_triggered = 0""",
+                lambda: {"u": rnd.randint(1, users)}),
+        }
+
+        def run_queries():
+            timings = {}
+            with engine.connect() as connection:
+                for name, (sql, make_params) in queries.items():
+                    timings[name] = timed(lambda: connection.execute(text(sql), make_params()).fetchall(), repeat)
+            return timings
+
+        before = run_queries()
+        start = time.perf_counter()
+        created = migrate(engine)
+        print(f"migrate() created {len(created)} indexes in {time.perf_counter() - start:.1f} s")
+        after = run_queries()
+
+        print(f"{'query':>28} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>9}")
+        for name in queries:
+            print(f"{name:>28} {before[name] * 1000:>12.2f} {after[name] * 1000:>11.3f} "
+                  f"{before[name] / after[name]:>8.0f}x")
+        engine.dispose()
+
+
+def bench_booking_links(n_offers=500, top_n=10, redraws=20):
+    """Per-card URL concatenation (old render loop) vs one BookingLinkBuilder per search."""
+    from datetime import date
+
+    from booking_links import BookingLinkBuilder
+    from offer_normalizer import iter_flight_offers, normalize_offers
+
+    from_loc, to_loc, adults, cabin_class, currency = "YVR", "PEK", 1, "ECONOMY", "USD"
+    depart_date, return_date = date(2025, 3, 5), date(2025, 3, 25)
+    fallback_url = f"https://flights.booking.com/flights/{from_loc}-{to_loc}/"
+    offers = list(normalize_offers(iter_flight_offers(sample_payload(n_offers)), currency, fallback_url))
+    # Progressive rendering redraws the top cards as offers arrive
+    cards = [offers[i % top_n] for i in range(top_n * redraws)]
+
+    def concatenated():
+        for _ in cards:
+            booking_url = f"https://flights.booking.com/flights/{from_loc}.AIRPORT-{to_loc}.AIRPORT/"
+            booking_url += f"?type={'ROUNDTRIP' if return_date else 'ONEWAY'}"
+            booking_url += f"&adults={adults}&cabinClass={cabin_class.upper()}"
+            booking_url += f"&from={from_loc}.AIRPORT&to={to_loc}.AIRPORT"
+            booking_url += f"&depart={depart_date.strftime('%Y-%m-%d')}"
+            booking_url += f"&return={return_date.strftime('%Y-%m-%d')}"
+            booking_url += f"&currency={currency}&sort=CHEAPEST"
+
+    def builder():
+        links = BookingLinkBuilder(from_loc, to_loc, depart_date, return_date, adults, cabin_class, currency)
+        for offer in cards:
+            links.link(offer)
+
+    def builder_all_offers():
+        links = BookingLinkBuilder(from_loc, to_loc, depart_date, return_date, adults, cabin_class, currency)
+        for offer in offers:
+            links.link(offer)
+
+    old, new, every = timed(concatenated, 20), timed(builder, 20), timed(builder_all_offers, 20)
+    print(f"{len(cards)} card renders: concatenation {old * 1e6:.0f} µs (one route URL for every card), "
+          f"builder {new * 1e6:.0f} µs (per-offer deep links) -> {old / new:.1f}x")
+    print(f"builder over all {n_offers} offers (uncached): {every * 1e6:.0f} µs "
+          f"({every / n_offers * 1e6:.2f} µs/offer)")
+
+
+def bench_normalize(n_offers=500, repeat=20):
+    """Datetime, duration and luggage hot path over a 500-offer searchFlights payload."""
+    from offer_normalizer import format_duration, get_luggage, iter_flight_offers, normalize_offers, parse_datetime
+
+    payload = sample_payload(n_offers)
+    segments = [segment for offer in payload["data"]["flightOffers"] for segment in offer["segments"]]
+    timestamps = [segment[field] for segment in segments for field in ("departureTime", "arrivalTime")]
+
+    # The previous implementations, for comparison
+    def strptime_parse(value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S")
+        except (TypeError, ValueError):
+            return None
+
+    def eager_duration(seconds):
+        return f"{int(seconds // 3600)}h {int((seconds % 3600) // 60):02d}m"
+
+    def walked_luggage(segment):
+        try:
+            checked = sum(item['luggageAllowance']['maxPiece'] for item in segment['travellerCheckedLuggage'])
+        except (KeyError, IndexError):
+            checked = 0
+        try:
+            cabin = sum(item['luggageAllowance']['maxPiece'] for item in segment['travellerCabinLuggage'])
+        except (KeyError, IndexError):
+            cabin = 0
+        return f"{checked} checked, {cabin} cabin"
+
+    rows = [
+        (f"parse {len(timestamps)} timestamps", lambda: [strptime_parse(v) for v in timestamps],
+         lambda: [parse_datetime(v) for v in timestamps]),
+        (f"format {len(segments)} durations", lambda: [eager_duration(s["totalTime"]) for s in segments],
+         lambda: [format_duration(s["totalTime"]) for s in segments]),
+        (f"summarize {len(segments)} luggage", lambda: [walked_luggage(s) for s in segments],
+         lambda: [get_luggage(s) for s in segments]),
+    ]
+    print(f"{'step':>28} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>8}")
+    for name, before, after in rows:
+        old, new = timed(before, repeat), timed(after, repeat)
+        print(f"{name:>28} {old * 1000:>12.2f} {new * 1000:>11.2f} {old / new:>7.1f}x")
+
+    full = timed(lambda: list(normalize_offers(iter_flight_offers(payload))), repeat)
+    print(f"normalize_offers over {n_offers} offers: {full * 1000:.2f} ms "
+          f"(durations are formatted at render time, for the top cards only)")
+
+
+def bench_alerts(alerts=100_000, routes=2000, users=5000):
+    """One alert cycle over 100k alerts on a few thousand routes, against FakeProvider."""
+    from datetime import date
+
+    from alert_worker import PRICE_DROP, evaluate_alerts, load_active_alerts
+    from create_db import Alert, FlightResult, FlightSearch, User, init_db
+    from providers import PROVIDERS
+
+    rnd = random.Random(7)
+    fake = PROVIDERS["fake"]
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        init_db(engine)
+        Session = sessionmaker(bind=engine)
+        route_list = [(f"O{i % 50:02d}", f"D{i // 50:02d}", datetime.combine(today, datetime.min.time())
+                       + timedelta(days=1 + i % 120)) for i in range(routes)]
+        with engine.begin() as connection:
+            connection.execute(User.__table__.insert(), [
+                {"email": f"u{i}@example.com", "password_hash": "x", "full_name": f"User {i}",
+                 "currency": "USD"} for i in range(users)])
+            connection.execute(FlightSearch.__table__.insert(), [
+                {"user_id": rnd.randint(1, users), "origin": origin, "destination": destination,
+                 "departure_date": departure, "trip_type": "One-way"}
+                for origin, destination, departure in (rnd.choice(route_list) for _ in range(alerts))])
+            connection.execute(Alert.__table__.insert(), [
+                {"user_id": rnd.randint(1, users), "search_id": i + 1, "alert_type": PRICE_DROP,
+                 "alert_triggered": False} for i in range(alerts)])
+            connection.execute(FlightResult.__table__.insert(), [
+                {"search_id": i + 1, "airline": "Fake Air", "price": 2000.0, "duration": "5h 00m",
+                 "retrieved_at": datetime.now() - timedelta(days=1)} for i in range(0, alerts, 10)])
+
+        with Session() as session:
+            start = time.perf_counter()
+            groups = load_active_alerts(session)
+            print(f"load + group {alerts} alerts into {len(groups)} routes: "
+                  f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+        fake.calls = 0
+        stats = evaluate_alerts(Session, ["fake"], max_calls=200, max_workers=16)
+        print(f"capped cycle (max_calls=200): {fake.calls} upstream searches, {stats['deferred']} routes deferred, "
+              f"{stats['triggered']} triggered")
+
+        fake.calls = 0
+        start = time.perf_counter()
+        stats = evaluate_alerts(Session, ["fake"], max_calls=routes, max_workers=16)
+        elapsed = time.perf_counter() - start
+        print(f"full cycle: {elapsed:.2f} s, {fake.calls} upstream searches for {stats['alerts']} alerts, "
+              f"{stats['triggered']} triggered")
+        engine.dispose()
+
+
+def bench_alert_schedule(routes=10_000, quota_per_minute=30):
+    """Upstream checks per day: fixed interval vs proximity/volatility-based refresh_interval()."""
+    from alert_scheduler import MIN_INTERVAL, refresh_interval
+
+    rnd = random.Random(3)
+    day = timedelta(days=1)
+    watched = [(rnd.randint(1, 300), rnd.choice([None, 0.01, 0.05, 0.2])) for _ in range(routes)]
+    fixed = routes * (day / MIN_INTERVAL)
+    adaptive = sum(day / refresh_interval(days, volatility) for days, volatility in watched)
+    budget = quota_per_minute * 60 * 24
+    print(f"{routes} routes departing in 1-300 days, quota {quota_per_minute}/min = {budget} checks/day")
+    print(f"fixed {MIN_INTERVAL} interval: {fixed:,.0f} checks/day -> "
+          f"{routes * budget / fixed:,.0f} routes fit the quota")
+    print(f"refresh_interval():      {adaptive:,.0f} checks/day -> "
+          f"{routes * budget / adaptive:,.0f} routes fit the quota ({fixed / adaptive:.1f}x)")
+
+
+def bench_login_load(concurrency=200, rounds=3):
+    """Concurrent POST /login against auth.py: pooled connections checked out during and after."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    import auth
+    from create_db import User, init_db, make_engine
+    from werkzeug.security import generate_password_hash
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        init_db(engine)
+        auth.db_session.remove()
+        auth.SessionLocal.configure(bind=engine)
+        with auth.SessionLocal() as db:
+            db.add(User(email="load@example.com", password_hash=generate_password_hash("secret"), full_name="Load"))
+            db.commit()
+
+        peak = [0]
+        sampling = threading.Event()
+
+        def sample():
+            while not sampling.is_set():
+                peak[0] = max(peak[0], engine.pool.checkedout())
+                time.sleep(0.001)
+
+        def login(i):
+            client = auth.app.test_client()
+            password = "secret" if i % 4 else "wrong"  # a quarter fail (the path that used to leak)
+            return client.post("/login", json={"email": "load@example.com", "password": password}).status_code
+
+        print(f"pool: size {engine.pool.size()}, max overflow {engine.pool._max_overflow}")
+        for round_number in range(1, rounds + 1):
+            peak[0] = 0
+            sampling.clear()
+            sampler = threading.Thread(target=sample)
+            sampler.start()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                statuses = list(pool.map(login, range(concurrency)))
+            elapsed = time.perf_counter() - start
+            sampling.set()
+            sampler.join()
+            print(f"round {round_number}: {concurrency} concurrent logins in {elapsed:.2f} s "
+                  f"({statuses.count(200)} ok, {statuses.count(401)} rejected, {statuses.count(503)} busy); "
+                  f"peak checked out {peak[0]}, after {engine.pool.checkedout()}")
+        auth.SessionLocal.configure(bind=auth.engine)
+        engine.dispose()
+
+
+def bench_password_hashing(logins=24):
+    """Logins/sec (verify) per work factor, sequential vs the bounded password pool."""
+    import passwords
+
+    methods = ["pbkdf2:sha256:260000", "pbkdf2:sha256:600000", "scrypt:16384:8:1", "scrypt:32768:8:1"]
+    print(f"password pool: {passwords.PASSWORD_WORKERS} workers")
+    print(f"{'method':>22} {'hash (ms)':>10} {'sequential/s':>13} {'pool/s':>8}")
+    for method in methods:
+        stored = passwords.hash_password("correct horse", method)
+        hash_time = timed(lambda: passwords.hash_password("correct horse", method), 3)
+
+        start = time.perf_counter()
+        for _ in range(logins):
+            passwords.verify(stored, "correct horse", method)
+        sequential = logins / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        futures = [passwords.verify_async(stored, "correct horse", method) for _ in range(logins)]
+        assert all(future.result()[0] for future in futures)
+        pooled = logins / (time.perf_counter() - start)
+        print(f"{method:>22} {hash_time * 1000:>10.1f} {sequential:>13.1f} {pooled:>8.1f}")
+
+    legacy = hashlib.sha256(b"correct horse").hexdigest()
+    print(f"legacy sha256 verify -> needs rehash: {passwords.verify(legacy, 'correct horse')}")
+
+
+def bench_profile_cache(users=1000, reads=5000):
+    """GET /profile with a cold vs warm profile cache, plus PUT write-through."""
+    import auth
+    from create_db import User, init_db, make_engine
+    from profile_cache import profile_cache
+
+    rnd = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        init_db(engine)
+        auth.db_session.remove()
+        auth.SessionLocal.configure(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(User.__table__.insert(), [
+                {"email": f"u{i}@example.com", "password_hash": "x", "full_name": f"User {i}", "currency": "USD"}
+                for i in range(users)])
+        client = auth.app.test_client()
+        user_ids = [rnd.randint(1, users) for _ in range(reads)]
+
+        def read_all():
+            for user_id in user_ids:
+                client.get(f"/profile?user_id={user_id}")
+
+        def cold():
+            for user_id in user_ids:
+                profile_cache.invalidate(user_id)
+                client.get(f"/profile?user_id={user_id}")
+
+        cold_time, warm_time = timed(cold, 1), timed(read_all, 3)
+        lookup = timed(lambda: [profile_cache.get(user_id) for user_id in user_ids], 3)
+        print(f"GET /profile: cold {cold_time / reads * 1e6:.0f} µs, warm {warm_time / reads * 1e6:.0f} µs "
+              f"per request (Flask test client overhead included)")
+        print(f"profile_cache.get() hit: {lookup / reads * 1e6:.2f} µs")
+
+        with client.session_transaction() as flask_session:
+            flask_session["user_email"] = "u0@example.com"
+        client.put("/profile", json={"currency": "CAD"})
+        print(f"after PUT currency=CAD: GET -> {client.get('/profile').get_json()['currency']}")
+        with client.session_transaction() as flask_session:
+            flask_session["user_id"] = 1
+        print(f"stats: {client.get('/profile/cache_stats').get_json()}")
+        auth.SessionLocal.configure(bind=auth.engine)
+        engine.dispose()
+
+
+BENCHMARKS = {
+    "bulk_insert": bench_bulk_insert,
+    "sqlite_concurrency": bench_sqlite_concurrency,
+    "db_init": bench_db_init,
+    "indexes": bench_indexes,
+    "booking_links": bench_booking_links,
+    "normalize": bench_normalize,
+    "alerts": bench_alerts,
+    "alert_schedule": bench_alert_schedule,
+    "login_load": bench_login_load,
+    "password_hashing": bench_password_hashing,
+    "profile_cache": bench_profile_cache,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"\n▶ {name}")
+        BENCHMARKS[name]()
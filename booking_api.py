@@ -0,0 +1,105 @@
+"""
+Booking.com (RapidAPI) searchFlights client shared by the Streamlit UI and the search service.
+
+Each response that actually comes from RapidAPI (a cache miss, or a streamed
+body read to the end) feeds its prices to the hourly price history, exactly
+once. Cache hits and coalesced callers don't record them again.
+"""
+import os
+from datetime import date
+
+import requests
+
+import http_client
+from offer_normalizer import iter_flight_offers, offer_price
+from offer_stream import iter_response_offers
+from rate_limit import TokenBucket
+from search_cache import search_cache
+from write_behind import search_writer
+
+# Booking.com API
+RAPIDAPI_HOST = "booking-com15.p.rapidapi.com"
+RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
+API_URL = f"https://{RAPIDAPI_HOST}/api/v1/flights/searchFlights"
+
+# ✅ One limiter per process: every searchFlights call that reaches RapidAPI shares the plan's rate limit
+rapidapi_limiter = TokenBucket()
+
+# Opt-in incremental parsing of the searchFlights body (skips the response cache)
+STREAM_PARSE = os.getenv("STREAM_PARSE", "0") == "1"
+
+
+def search_params(from_loc, to_loc, depart_date, return_date, currency, adults, children, cabin_class):
+    """Builds the searchFlights query params for one date pair."""
+    return {
+        "currency_code": currency,
+        "fromId": f"{from_loc}.AIRPORT",
+        "toId": f"{to_loc}.AIRPORT",
+        "departDate": depart_date.strftime("%Y-%m-%d"),
+        "returnDate": return_date.strftime("%Y-%m-%d") if return_date else "",
+        "adults": adults,
+        "children": f"{children},17" if children else "0",
+        "cabinClass": cabin_class,
+        "sort": "CHEAPEST"
+    }
+
+
+def rapidapi_headers():
+    return {
+        "x-rapidapi-host": RAPIDAPI_HOST.encode("ascii", "ignore").decode(),
+        "x-rapidapi-key": (RAPIDAPI_KEY or "").encode("ascii", "ignore").decode()
+    }
+
+
+def _add_price(prices, offer):
+    try:
+        prices.append(offer_price(offer))
+    except (KeyError, TypeError):
+        pass  # skipped by normalize_offers too
+
+
+def record_response_prices(params, prices):
+    """Hands the prices of one upstream searchFlights response to the price history (write-behind)."""
+    search_writer.submit_prices(params["fromId"].split(".")[0], params["toId"].split(".")[0],
+                                date.fromisoformat(params["departDate"]), params["cabinClass"],
+                                params["currency_code"], prices)
+
+
+def fetch_flights(params, headers):
+    """Calls searchFlights, reusing a cached response for identical params."""
+    def fetch(params):
+        rapidapi_limiter.acquire()  # only cache misses spend a token
+        response = http_client.get(API_URL, headers=headers, params=params)
+        response.raise_for_status()
+        data = response.json()
+        prices = []
+        for offer in iter_flight_offers(data):
+            _add_price(prices, offer)
+        record_response_prices(params, prices)  # ✅ once per upstream response
+        return data
+
+    return search_cache.get_or_fetch(params, fetch)
+
+
+def fetch_flight_offers(params, headers):
+    """Yields raw flightOffers elements, streaming the body when STREAM_PARSE is on."""
+    if not STREAM_PARSE:
+        return iter_flight_offers(fetch_flights(params, headers))
+
+    rapidapi_limiter.acquire()
+    response = http_client.get(API_URL, headers=headers, params=params, stream=True)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return _recording(params, iter_response_offers(response))
+
+
+def _recording(params, raw_offers):
+    """Passes streamed offers through; records their prices once the whole body was read."""
+    prices = []
+    for offer in raw_offers:
+        _add_price(prices, offer)
+        yield offer
+    record_response_prices(params, prices)
@@ -0,0 +1,81 @@
+"""
+"Book Now" links for result cards.
+
+BookingLinkBuilder is created once per search. It pre-renders the parts of the
+Booking.com URL shared by every offer (route path and query string), so each
+card only fills in what is specific to its offer:
+- the provider's own deepLink, when it is a valid https URL on a known
+  booking domain;
+- otherwise a Booking.com link built from the offer token;
+- otherwise the route-level search URL.
+Links are cached per offer, so the cards redrawn during progressive rendering
+don't rebuild them.
+"""
+import os
+from urllib.parse import quote, urlencode, urlsplit
+
+BOOKING_FLIGHTS_URL = "https://flights.booking.com/flights/"
+
+# Domains a provider deepLink may point to (anything else falls back to Booking.com)
+ALLOWED_LINK_DOMAINS = tuple(
+    domain.strip() for domain in
+    os.getenv("BOOKING_LINK_DOMAINS", "booking.com,skyscanner.net,skyscanner.com,google.com").split(",")
+    if domain.strip()
+)
+
+
+def is_valid_link(url, allowed_domains=ALLOWED_LINK_DOMAINS):
+    """True for an absolute https URL on an allowed domain that is safe to put in an href."""
+    if not url or any(char in url for char in ' "\'<>\n\r\t'):
+        return False
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    host = (parts.hostname or "").lower()
+    return parts.scheme == "https" and any(host == domain or host.endswith("." + domain)
+                                           for domain in allowed_domains)
+
+
+class BookingLinkBuilder:
+    """Per-search link template; link(offer) returns the URL for one offer."""
+
+    def __init__(self, from_loc, to_loc, depart_date, return_date, adults, cabin_class, currency):
+        route = quote(f"{from_loc}.AIRPORT-{to_loc}.AIRPORT") + "/"
+        params = {
+            "type": "ROUNDTRIP" if return_date else "ONEWAY",
+            "adults": adults,
+            "cabinClass": cabin_class.upper(),
+            "from": f"{from_loc}.AIRPORT",
+            "to": f"{to_loc}.AIRPORT",
+            "depart": depart_date.strftime("%Y-%m-%d"),
+        }
+        if return_date:
+            params["return"] = return_date.strftime("%Y-%m-%d")
+        params.update(currency=currency, sort="CHEAPEST")
+
+        self._route_url = BOOKING_FLIGHTS_URL + route
+        self._query_string = "?" + urlencode(params)
+        self.search_url = self._route_url + self._query_string
+        # What BookingProvider stores as booking_url when the API returned no deepLink
+        self.fallback_url = f"{BOOKING_FLIGHTS_URL}{from_loc}-{to_loc}/"
+        self._links = {}
+
+    @classmethod
+    def for_query(cls, query):
+        return cls(query["from_loc"], query["to_loc"], query["depart_date"], query["return_date"],
+                   query["adults"], query["cabin_class"], query["currency"])
+
+    def link(self, offer):
+        key = (offer.provider, offer.token, offer.booking_url)
+        url = self._links.get(key)
+        if url is None:
+            url = self._links[key] = self._build(offer)
+        return url
+
+    def _build(self, offer):
+        if offer.booking_url != self.fallback_url and is_valid_link(offer.booking_url):
+            return offer.booking_url
+        if offer.token and offer.provider == "booking":
+            return f"{self._route_url}{quote(offer.token, safe='')}/{self._query_string}"
+        return self.search_url
@@ -1,116 +1,96 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, ForeignKey
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
-from datetime import datetime, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy.orm import clear_mappers
+import os
+import threading
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
 
-clear_mappers()  # ✅ Clears any previously cached mappers
-
-Base = declarative_base()
-
-# ✅ Users Table
-class User(Base):
-    __tablename__ = "users"
-
-    user_id = Column(Integer, primary_key=True, autoincrement=True, index=True)
-    email = Column(String, unique=True, nullable=False)
-    password_hash = Column(String, nullable=False)
-    full_name = Column(String, nullable=False)
-    gender = Column(String, nullable=True)
-    flight_type = Column(String, nullable=True)  # Nonstop or Any
-    currency = Column(String, nullable=True)  # USD or CAD
-    market = Column(String, nullable=True)  # Market Region (US, CA, etc.)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
-
-    # Relationships:
-    subscriptions = relationship("Subscription", back_populates="user", cascade="all, delete-orphan")
-    flight_searches = relationship("FlightSearch", back_populates="user", cascade="all, delete-orphan")
-    alerts = relationship("Alert", back_populates="user", cascade="all, delete-orphan")
-
-    def set_password(self, password):
-        """Hashes and sets the password"""
-        self.password_hash = generate_password_hash(password)
-
-    def check_password(self, password):
-        """Validates a password against the stored hash"""
-        return check_password_hash(self.password_hash, password)
-
-# ✅ Subscription Table
-class Subscription(Base):
-    __tablename__ = "subscriptions"
-
-    subscription_id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
-    plan_name = Column(String, nullable=False)
-    start_date = Column(DateTime, nullable=False)
-    end_date = Column(DateTime, nullable=True)
-    status = Column(String, nullable=False)
-    price = Column(Float, nullable=False)
-    payment_method = Column(String, nullable=True)
-    subscription_type = Column(String, nullable=True)
-
-    user = relationship("User", back_populates="subscriptions")
-
-# ✅ Flight Search Table
-class FlightSearch(Base):
-    __tablename__ = 'flight_search'
-
-    search_id = Column(Integer, primary_key=True, autoincrement=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
-    origin = Column(String, nullable=False)
-    destination = Column(String, nullable=False)
-    departure_date = Column(DateTime, nullable=False)
-    return_date = Column(DateTime, nullable=True)
-    trip_type = Column(String, nullable=False)  # One-way or Round-trip
-    search_URL = Column(String, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-
-    user = relationship("User", back_populates="flight_searches")
-    flight_results = relationship("FlightResult", back_populates="search", cascade="all, delete-orphan")
-    alerts = relationship("Alert", back_populates="search", cascade="all, delete-orphan")
-
-# ✅ Flight Results Table
-class FlightResult(Base):
-    __tablename__ = 'flight_results'
-
-    result_id = Column(Integer, primary_key=True, autoincrement=True)
-    search_id = Column(Integer, ForeignKey('flight_search.search_id'), nullable=False)
-    airline = Column(String, nullable=False)
-    price = Column(Float, nullable=False)
-    flight_number = Column(String, nullable=True)
-    departure_time = Column(DateTime, nullable=True)
-    arrival_time = Column(DateTime, nullable=True)
-    duration = Column(String, nullable=False)
-    stops = Column(Integer, nullable=True)
-    booking_url = Column(String, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    retrieved_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-
-    search = relationship("FlightSearch", back_populates="flight_results")
-
-# ✅ Alerts Table
-class Alert(Base):
-    __tablename__ = 'alerts'
-
-    alert_id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
-    search_id = Column(Integer, ForeignKey('flight_search.search_id'), nullable=False)
-    alert_type = Column(String, nullable=False)  # e.g., "Price Drop", "Availability Change"
-    price_change = Column(Float, nullable=True)
-    alert_triggered = Column(Boolean, default=False)
-    triggered_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
-
-    user = relationship("User", back_populates="alerts")
-    search = relationship("FlightSearch", back_populates="alerts")
+# ✅ Models live in models.py; importing this module has no DB side effects.
+# Call init_db() once per process (or run `python create_db.py`) to create the tables.
+from models import Base, User, Subscription, FlightSearch, FlightResult, Alert, PriceHistory
 
 # ✅ SQLite Database Connection
-engine = create_engine('sqlite:///flight_search_app.db')
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///flight_search_app.db")
+
+# SQLite tuning applied to every new connection (set DB_TUNING=0 to use SQLite defaults)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # readers no longer block the writer (and vice versa)
+    "synchronous": "NORMAL",  # fsync at checkpoints only; safe with WAL
+    "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),  # wait for locks instead of failing
+    "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": -int(os.getenv("DB_CACHE_SIZE_KB", str(64 * 1024))),  # negative = KiB
+    "temp_store": "MEMORY",
+}
+
+# Connection pool shared by the threads of one process (Flask or Streamlit)
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_pre_ping": True,
+}
+
+def make_engine(url=DATABASE_URL, tuned=os.getenv("DB_TUNING", "1") == "1", **engine_kwargs):
+    """Creates an engine with the SQLite tuning profile and a sized connection pool."""
+    if not tuned:
+        return create_engine(url, **engine_kwargs)
+
+    is_sqlite = url.startswith("sqlite")
+    is_memory = is_sqlite and (url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url)
+    options = {} if is_memory else dict(POOL_OPTIONS)
+    if is_sqlite:
+        options["connect_args"] = {"check_same_thread": False,
+                                   "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000}
+    options.update(engine_kwargs)
+    new_engine = create_engine(url, **options)
+
+    if is_sqlite:
+        @event.listens_for(new_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    return new_engine
+
+engine = make_engine()
 
-# ✅ Create Tables in Database
 SessionLocal = sessionmaker(bind=engine) # ✅ Create a session factory
-Base.metadata.create_all(engine)
 
-print("✅ Database tables created successfully!")
\ No newline at end of file
+_initialized_urls = set()
+_init_lock = threading.Lock()
+
+def migrate(bind=None):
+    """Adds nullable columns and indexes declared on the models that an existing database is missing."""
+    bind = bind or engine
+    created = []
+    for table in Base.metadata.sorted_tables:
+        with bind.begin() as connection:
+            existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=connection.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+                    created.append(f"{table.name}.{column.name}")
+        for index in table.indexes:
+            with bind.begin() as connection:
+                existing = {ix["name"] for ix in inspect(connection).get_indexes(table.name)}
+                if index.name not in existing:
+                    index.create(connection)
+                    created.append(index.name)
+    return created
+
+def init_db(bind=None):
+    """Creates missing tables and indexes. Idempotent, and a no-op after the first call per database."""
+    bind = bind or engine
+    key = str(bind.url)
+    with _init_lock:
+        if key in _initialized_urls:
+            return False
+        Base.metadata.create_all(bind)
+        migrate(bind)
+        _initialized_urls.add(key)
+        return True
+
+if __name__ == "__main__":
+    init_db()
+    print("✅ Database tables created successfully!")
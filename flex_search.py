@@ -0,0 +1,67 @@
+"""
+Flexible-date (±N days) search.
+
+flexible_search() fans a price lookup out over every departure (and optional
+return) date in the window through a bounded thread pool. The RapidAPI rate
+limit is applied by booking_api.fetch_flights on cache misses, and date pairs
+already priced in this session are served from the caller's `known` dict
+instead of re-fetched. Dates before today are never priced.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+MAX_WORKERS = int(os.getenv("FLEX_MAX_WORKERS", "6"))
+
+
+def date_window(center, days):
+    """Dates from center - days to center + days (inclusive), skipping any before today."""
+    window = [center + timedelta(days=offset) for offset in range(-days, days + 1)]
+    return [day for day in window if day >= date.today()]
+
+
+def flexible_search(fetch_price, depart_dates, return_dates=None, known=None, max_workers=MAX_WORKERS,
+                    errors=None):
+    """Prices every (depart, return) pair concurrently.
+
+    fetch_price(depart, return_or_None) returns the cheapest price (or None) for one
+    pair. Results are merged into and returned as `known`, keyed by the date pair.
+    Failed pairs are appended to `errors` as (pair, exception) when a list is passed;
+    if every pair failed, the first error is raised.
+    """
+    known = {} if known is None else known
+    pairs = [(depart, ret) for depart in depart_dates for ret in (return_dates or [None])
+             if ret is None or ret > depart]
+    missing = [pair for pair in pairs if pair not in known]
+
+    def task(pair):
+        try:
+            return pair, fetch_price(*pair), True
+        except Exception as e:
+            return pair, e, False
+
+    failed = []
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as pool:
+            for pair, result, ok in pool.map(task, missing):
+                if ok:  # ✅ Failed days are retried on the next run
+                    known[pair] = result
+                else:
+                    failed.append((pair, result))
+    if errors is not None:
+        errors.extend(failed)
+    if failed and len(failed) == len(missing):
+        raise failed[0][1]
+    return known
+
+
+def price_calendar(prices, depart_dates, return_dates=None, fmt="%b %d"):
+    """Grid of prices: {return column: {depart row: price}} (a single column for one-way)."""
+    if not return_dates:
+        return {"Price": {depart.strftime(fmt): prices.get((depart, None)) for depart in depart_dates}}
+    return {
+        f"Return {ret.strftime(fmt)}": {
+            f"Depart {depart.strftime(fmt)}": prices.get((depart, ret)) for depart in depart_dates
+        }
+        for ret in return_dates
+    }
@@ -1,52 +1,32 @@
 import streamlit as st
-import requests
-import json
+import http_client
 import os
 from datetime import datetime, timedelta
 from sqlalchemy.orm import sessionmaker
-from create_db import engine, User, FlightSearch, FlightResult
-
-# Configuration
-# Booking.com API
-RAPIDAPI_HOST = "booking-com15.p.rapidapi.com"
-RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
-API_URL = f"https://{RAPIDAPI_HOST}/api/v1/flights/searchFlights"
+from create_db import engine, init_db
+from booking_api import fetch_flights, rapidapi_headers, search_params
+from offer_normalizer import iter_flight_offers, normalize_offers
+from ranking import rank_offers, SORT_LABELS
+from price_history import price_series
+from flex_search import date_window, flexible_search, price_calendar
+from search_service import CABIN_CLASSES, search_offers
+from logo_cache import logo_image
+from booking_links import BookingLinkBuilder
 
 # Flask API
 BASE_URL = "http://127.0.0.1:5000"
 
+# Search backend: set SEARCH_SERVICE_URL (e.g. the Flask API) to run searches there
+# instead of inside this Streamlit process
+SEARCH_SERVICE_URL = os.getenv("SEARCH_SERVICE_URL")
+
 # Create DB session
 SessionLocal = sessionmaker(bind=engine)
+init_db()  # ✅ Creates missing tables once per process; a no-op on every rerun
 
 def safe_strftime(dt, fmt="%b %d, %H:%M"):
     return dt.strftime(fmt) if dt else "N/A"
 
-def parse_datetime(date_str):
-    try:
-        return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S")
-    except (TypeError, ValueError):
-        return None
-    
-def format_duration(seconds):
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    return f"{int(hours)}h {int(minutes):02d}m"
-
-def get_luggage(segment):
-    try:
-        checked = sum(item['luggageAllowance']['maxPiece'] 
-                  for item in segment['travellerCheckedLuggage'])
-    except (KeyError, IndexError):
-        checked = 0
-        
-    try:
-        cabin = sum(item['luggageAllowance']['maxPiece'] 
-                for item in segment['travellerCabinLuggage'])
-    except (KeyError, IndexError):
-        cabin = 0
-    
-    return f"{checked} checked, {cabin} cabin"
-
 # Streamlit UI
 st.title("✈️ Smart Flight Finder")
 
@@ -57,7 +37,7 @@ if "user" not in st.session_state:
 if st.session_state["user"]:
     st.sidebar.write(f"👤 Logged in as: {st.session_state['user']['email']}")
     if st.sidebar.button("Logout"):
-        requests.post(f"{BASE_URL}/logout")
+        http_client.post(f"{BASE_URL}/logout")
         st.session_state["user"] = None
         st.rerun()
 else:
@@ -68,7 +48,7 @@ else:
         login_email = st.sidebar.text_input("Email")
         login_password = st.sidebar.text_input("Password", type="password")
         if st.sidebar.button("Login"):
-            response = requests.post(f"{BASE_URL}/login", json={"email": login_email, "password": login_password})
+            response = http_client.post(f"{BASE_URL}/login", json={"email": login_email, "password": login_password})
             if response.status_code == 200:
                 user_data = response.json()
                 st.session_state["user"] = {
@@ -83,7 +63,7 @@ else:
         register_password = st.sidebar.text_input("Password", type="password")
         full_name = st.sidebar.text_input("Full Name")
         if st.sidebar.button("Register"):
-            response = requests.post(f"{BASE_URL}/register", json={
+            response = http_client.post(f"{BASE_URL}/register", json={
                 "email": register_email,
                 "password": register_password,
                 "full_name": full_name
@@ -105,220 +85,174 @@ trip_type = st.radio("Trip Type", ["One-way", "Round-trip"], horizontal=True)
 return_date = st.date_input("Return Date", depart_date + timedelta(days=20)) if trip_type == "Round-trip" else None
 top_n = st.slider("Number of top flights to display", 3, 10, 5)  # Restored Top N
 
-cabin_class = st.selectbox("Cabin Class", ["ECONOMY", "PREMIUM_ECONOMY", "BUSINESS", "FIRST"])
+cabin_class = st.selectbox("Cabin Class", CABIN_CLASSES)
 adults = st.number_input("Adults", 1, 5, 1)
 children = st.number_input("Children", 0, 5, 0)
 flight_type = st.radio("Stops", ["Any", "Nonstop Only"], horizontal=True)
+sort_by = st.selectbox("Sort By", list(SORT_LABELS), format_func=SORT_LABELS.get)
+departure_window = st.slider("Outbound Departure Time (hour)", 0, 24, (0, 24))
+flex_days = st.slider("Flexible dates (± days)", 1, 3, 2)
+
+def render_offer_card(idx, offer, links):
+    with st.container(border=True):
+        # Header row with option number, price, and book button
+        col_header = st.columns([3, 2, 1])
+
+        with col_header[0]:
+            st.markdown(f"### Option {idx}")
+        with col_header[1]:
+            st.markdown(f"#### {offer.currency} {offer.price:,.2f}")
+        with col_header[2]:
+            booking_url = links.link(offer)
+            if booking_url:
+                st.markdown(
+                    f'<a href="{booking_url}" target="_blank"><button style="background-color:#4CAF50;color:white;padding:8px 16px;border:none;border-radius:4px;cursor:pointer;">Book Now</button></a>',
+                    unsafe_allow_html=True)
+            else:
+                st.write("")  # Empty placeholder
+
+        # Flight details columns
+        flight_cols = st.columns(2)
+
+        # Outbound Flight
+        with flight_cols[0]:
+            # Use columns for logo + text
+            col_logo, col_text = st.columns([1, 4])
+            with col_logo:
+                if offer.outbound.logo:
+                    st.image(logo_image(offer.outbound), width=50, output_format="auto")
+            with col_text:
+                st.markdown(f"**{offer.outbound.airline}**  \nFlight {offer.outbound.flight_num}")
+            st.write(f"🛫 Outbound: {offer.outbound.from_city} → {offer.outbound.to_city}")
+            st.write(f"**Departure:** {safe_strftime(offer.outbound.departure, '%b %d, %Y %H:%M')}")
+            st.write(f"**Arrival:** {safe_strftime(offer.outbound.arrival, '%b %d, %Y %H:%M')}")
+            st.write(f"**Duration:** {offer.outbound.duration}")
+            st.write(f"**Stops:** {offer.outbound.stops} | **Luggage:** {offer.outbound.luggage}")
+
+        # Return Flight (if exists)
+        if offer.inbound:
+            with flight_cols[1]:
+                 # Use columns for logo + text
+                col_logo_ret, col_text_ret = st.columns([1, 4])
+                with col_logo_ret:
+                    if offer.inbound.logo:
+                        st.image(logo_image(offer.inbound), width=50, output_format="auto")
+                with col_text_ret:
+                    st.markdown(f"**{offer.inbound.airline}**  \nFlight {offer.inbound.flight_num}")  # Fixed here
+
+                st.write(f"🛬 Return: {offer.inbound.from_city} → {offer.inbound.to_city}")
+                st.write(f"**Departure:** {safe_strftime(offer.inbound.departure, '%b %d, %Y %H:%M')}")
+                st.write(f"**Arrival:** {safe_strftime(offer.inbound.arrival, '%b %d, %Y %H:%M')}")
+                st.write(f"**Duration:** {offer.inbound.duration}")
+                st.write(f"**Stops:** {offer.inbound.stops} | **Luggage:** {offer.inbound.luggage}")
+
+        #st.markdown("---")
+        
+
+        # # Return details if available
+        # if offer['return']:
+        #     with st.expander(f"🛬 Return: {to_loc} → {from_loc}", expanded=True):
+        #         col1, col2 = st.columns([1, 4])
+        #         with col1:
+        #             logo = AIRLINE_LOGOS.get(offer['return']['airline'])
+        #             if logo:
+        #                 st.image(logo, width=60)
+        #         with col2:
+        #             st.write(f"**{offer['return']['airline']}** (Flight {offer['return']['flight_num']})")
+        #             st.write(f"**Departure:** {safe_strftime(offer['return']['departure'], '%b %d, %Y %H:%M')}")
+        #             st.write(f"**Arrival:** {safe_strftime(offer['return']['arrival'], '%b %d, %Y %H:%M')}")
+        #             st.write(f"**Duration:** {offer['return']['duration']}")
+        #             st.write(f"**Stops:** {offer['return']['stops']} | **Luggage:** {offer['return']['luggage']}")
+        
+        #st.markdown("---")
+
+
+def render_results(offers, total_offers, searching, links):
+    """Draws the header and ranked cards; called again in place as more offers arrive."""
+    st.title(f"✈️ {from_loc} ↔ {to_loc} Flight Deals")
+    st.markdown(f"## **Top {(top_n)} {SORT_LABELS[sort_by]} {'Round-trip' if return_date else 'One-way'} Options**")
+    if searching:
+        st.caption(f"⏳ Still searching... ranked from {total_offers} offers so far")
+    else:
+        st.caption(f"Ranked locally from {total_offers} offers")
+        if not offers:
+            st.warning("No flights match your filters.")
+    for idx, offer in enumerate(offers, 1):
+        render_offer_card(idx, offer, links)
+
 
 if st.button("🔍 Find Flights"):
+    # ✅ Results render into one placeholder and are redrawn in place as providers report
+    # more offers, so the first cards show up long before a slow search finishes
+    results_placeholder = st.empty()
+    shown = []
+
+    def show_partial(ranked, total):
+        if ranked != shown:  # only redraw when the top N actually changed
+            shown[:] = ranked
+            with results_placeholder.container():
+                render_results(ranked, total, searching=True, links=links)
+
     with st.spinner("Searching flights..."):
-        session = None
         try:
-            # Database setup
-            session = SessionLocal()
-            flight_search = FlightSearch(
-                user_id=st.session_state["user"]["user_id"] if st.session_state["user"] else None,
-                origin=from_loc,
-                destination=to_loc,
-                departure_date=depart_date,
-                return_date=return_date,
-                trip_type=trip_type,
-                created_at=datetime.now()
-            )
-            session.add(flight_search)
-            session.commit()
-
-            # API Request
-            params = {
-                "currency_code": currency,
-                "fromId": f"{from_loc}.AIRPORT",
-                "toId": f"{to_loc}.AIRPORT",
-                "departDate": depart_date.strftime("%Y-%m-%d"),
-                "returnDate": return_date.strftime("%Y-%m-%d") if return_date else "",
+            query = {
+                "from_loc": from_loc,
+                "to_loc": to_loc,
+                "depart_date": depart_date,
+                "return_date": return_date,
+                "currency": currency,
                 "adults": adults,
-                "children": f"{children},17" if children else "0",
-                "cabinClass": cabin_class,
-                "sort": "CHEAPEST"
+                "children": children,
+                "cabin_class": cabin_class,
+                "sort_by": sort_by,
+                "top_n": top_n,
+                "nonstop_only": flight_type == "Nonstop Only",
+                "departure_window": departure_window if departure_window != (0, 24) else None,
             }
+            user_id = st.session_state["user"]["user_id"] if st.session_state["user"] else None
+            links = BookingLinkBuilder.for_query(query)  # ✅ URL template built once per search
+            # Fetch + normalize + rank (and background persistence) happen in the search backend
+            processed_offers, total_offers = search_offers(query, user_id, SEARCH_SERVICE_URL,
+                                                           on_progress=show_partial)
 
-            headers = {
-                "x-rapidapi-host": RAPIDAPI_HOST.encode("ascii", "ignore").decode(),
-                "x-rapidapi-key": RAPIDAPI_KEY.encode("ascii", "ignore").decode()
-            }
+            # Display results
+            with results_placeholder.container():
+                render_results(processed_offers, total_offers, searching=False, links=links)
 
-            response = requests.get(API_URL, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            # print(data) # Debugging print data
-            # print("_______________________________")
-
-            # Process flights
-            processed_offers = []
-            for offer in data.get("data", {}).get("flightOffers", []):
-                try:
-                    price_data = offer['priceBreakdown']['total']
-                    price = price_data['units'] + price_data['nanos']/1e9
-                    currency = price_data.get('currencyCode', currency)
-                    
-                    # Get outbound and return segments
-                    outbound = offer['segments'][0]
-                    return_flight = offer['segments'][1] if len(offer['segments']) > 1 else None
-                    
-                    # Process outbound flight
-                    outbound_leg = outbound['legs'][0]
-                    outbound_carrier = outbound_leg['carriersData'][0]
-                    outbound_airline = outbound_carrier.get('name', 'Unknown')
-                    outbound_flight_num = outbound_leg.get('flightInfo', {}).get('flightNumber', '')
-                    outbound_logo = outbound_carrier.get("logo", "")
-                    #outbound_airport = outbound['departureAirport']['cityName']
-                    
-                    # Process return flight if exists
-                    return_info = {}
-                    if return_flight:
-                        return_leg = return_flight['legs'][0]
-                        return_carrier = return_leg['carriersData'][0]
-                        return_airline = return_carrier.get('name', 'Unknown')
-                        return_logo = return_carrier.get("logo", "")
-                        return_info = {
-                            'airline': return_carrier.get('name', 'Unknown'),
-                            'flight_num': return_leg.get('flightInfo', {}).get('flightNumber', ''),
-                            'departure': parse_datetime(return_flight['departureTime']),
-                            'arrival': parse_datetime(return_flight['arrivalTime']),
-                            'duration': format_duration(return_flight['totalTime']),
-                            'stops': len(return_flight['legs']) - 1,
-                            'luggage': get_luggage(return_flight),
-                            'logo': return_logo
-                        }
-
-                    processed_offers.append({
-                        'price': price,
-                        'currency': currency,
-                        'outbound': {
-                            'airline': outbound_airline,
-                            'flight_num': outbound_flight_num,
-                            'departure': parse_datetime(outbound['departureTime']),
-                            'arrival': parse_datetime(outbound['arrivalTime']),
-                            'duration': format_duration(outbound['totalTime']),
-                            'stops': len(outbound['legs']) - 1,
-                            'luggage': get_luggage(outbound),
-                            'logo': outbound_logo
-                        },
-                        'return': return_info if return_flight else None,
-                        'booking_url': offer.get('deepLink') or f"https://flights.booking.com/flights/{from_loc}-{to_loc}/"
-                    })
-                    
-                except (KeyError, IndexError) as e:
-                    continue
-            # print(processed_offers) # Debugging print processed_offers
 
-            # Display results
-            st.title(f"✈️ {from_loc} ↔ {to_loc} Flight Deals")
-            st.markdown(f"## **Top {(top_n)} Cheapest {'Round-trip' if return_date else 'One-way'} Options**")
-
-            for idx, offer in enumerate(processed_offers[:top_n], 1):
-                with st.container(border=True):
-                    # Header row with option number, price, and book button
-                    col_header = st.columns([3, 2, 1])
-
-                    # Modify URL generation to include currency
-                    booking_url = f"https://flights.booking.com/flights/{from_loc}.AIRPORT-{to_loc}.AIRPORT/"
-                    booking_url += f"?type={'ROUNDTRIP' if return_date else 'ONEWAY'}"
-                    booking_url += f"&adults={adults}&cabinClass={cabin_class.upper()}"
-                    booking_url += f"&from={from_loc}.AIRPORT&to={to_loc}.AIRPORT"
-                    booking_url += f"&depart={depart_date.strftime('%Y-%m-%d')}"
-                    if trip_type and return_date:
-                        booking_url += f"&return={return_date.strftime('%Y-%m-%d')}"
-                    booking_url += f"&currency={currency}&sort=CHEAPEST"  
-                   
-                    with col_header[0]:
-                        st.markdown(f"### Option {idx}")
-                    with col_header[1]:
-                        st.markdown(f"#### {offer['currency']} {offer['price']:,.2f}")
-                    with col_header[2]:
-                        if offer['booking_url']:
-                            st.markdown(
-                                f'<a href="{booking_url}" target="_blank"><button style="background-color:#4CAF50;color:white;padding:8px 16px;border:none;border-radius:4px;cursor:pointer;">Book Now</button></a>',
-                                unsafe_allow_html=True)
-                        else:
-                            st.write("")  # Empty placeholder
-        
-                    # Flight details columns
-                    flight_cols = st.columns(2)
-        
-                    # Outbound Flight
-                    with flight_cols[0]:
-                        # Use columns for logo + text
-                        col_logo, col_text = st.columns([1, 4])
-                        with col_logo:
-                            if offer['outbound']['logo']:
-                                st.image(offer['outbound']['logo'], width=50, output_format="auto")
-                        with col_text:
-                            st.markdown(f"**{offer['outbound']['airline']}**  \nFlight {offer['outbound']['flight_num']}")
-                        st.write(f"🛫 Outbound: {outbound['departureAirport']['cityName']} → {outbound['arrivalAirport']['cityName']}")
-                        st.write(f"**Departure:** {safe_strftime(offer['outbound']['departure'], '%b %d, %Y %H:%M')}")
-                        st.write(f"**Arrival:** {safe_strftime(offer['outbound']['arrival'], '%b %d, %Y %H:%M')}")
-                        st.write(f"**Duration:** {offer['outbound']['duration']}")
-                        st.write(f"**Stops:** {offer['outbound']['stops']} | **Luggage:** {offer['outbound']['luggage']}")
-
-                    # Return Flight (if exists)
-                    if offer['return']:
-                        with flight_cols[1]:
-                             # Use columns for logo + text
-                            col_logo_ret, col_text_ret = st.columns([1, 4])
-                            with col_logo_ret:
-                                if offer['return']['logo']:
-                                    st.image(offer['return']['logo'], width=50, output_format="auto")
-                            with col_text_ret:
-                                st.markdown(f"**{offer['return']['airline']}**  \nFlight {offer['return']['flight_num']}")  # Fixed here
-
-                            st.write(f"🛬 Return: {return_flight['departureAirport']['cityName']} → {return_flight['arrivalAirport']['cityName']}")
-                            st.write(f"**Departure:** {safe_strftime(offer['return']['departure'], '%b %d, %Y %H:%M')}")
-                            st.write(f"**Arrival:** {safe_strftime(offer['return']['arrival'], '%b %d, %Y %H:%M')}")
-                            st.write(f"**Duration:** {offer['return']['duration']}")
-                            st.write(f"**Stops:** {offer['return']['stops']} | **Luggage:** {offer['return']['luggage']}")
-
-                    #st.markdown("---")
-                    
-    
-                    # # Return details if available
-                    # if offer['return']:
-                    #     with st.expander(f"🛬 Return: {to_loc} → {from_loc}", expanded=True):
-                    #         col1, col2 = st.columns([1, 4])
-                    #         with col1:
-                    #             logo = AIRLINE_LOGOS.get(offer['return']['airline'])
-                    #             if logo:
-                    #                 st.image(logo, width=60)
-                    #         with col2:
-                    #             st.write(f"**{offer['return']['airline']}** (Flight {offer['return']['flight_num']})")
-                    #             st.write(f"**Departure:** {safe_strftime(offer['return']['departure'], '%b %d, %Y %H:%M')}")
-                    #             st.write(f"**Arrival:** {safe_strftime(offer['return']['arrival'], '%b %d, %Y %H:%M')}")
-                    #             st.write(f"**Duration:** {offer['return']['duration']}")
-                    #             st.write(f"**Stops:** {offer['return']['stops']} | **Luggage:** {offer['return']['luggage']}")
-                    
-                    #st.markdown("---")
-
-
-                # Save result (ensure your FlightResult model matches these fields)
-                # session.add(FlightResult(
-                #     search_id=flight_search.search_id,
-                #     airline=flight['airlines'],
-                #     price=flight['price'],
-                #     flight_number=flight['flight_nums'],
-                #     departure_time=flight['departure'],
-                #     arrival_time=flight['arrival'],
-                #     duration=(flight['arrival'] - flight['departure']).total_seconds() // 60,
-                #     stops=flight['stops'],
-                #     baggage_info=flight['baggage'],
-                #     booking_url=flight['booking_url'],    # Changed from 'url' to 'booking_url'
-                #     retrieved_at=datetime.now()
-                # ))
-
-            session.commit()
+            # Price trend for this route/date/cabin over the last 30 days
+            with SessionLocal() as history_session:
+                series = price_series(history_session, from_loc, to_loc, depart_date, cabin_class, currency)
+            if len(series) > 1:
+                st.subheader(f"📈 {from_loc} → {to_loc} {cabin_class.title()} price history (30 days)")
+                st.line_chart(series, x="hour", y=["min", "median", "max"])
+
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+
+if st.button("📅 Price Calendar"):
+    with st.spinner(f"Checking prices for ±{flex_days} days..."):
+        try:
+            headers = rapidapi_headers()
+            nonstop_only = flight_type == "Nonstop Only"
+
+            def cheapest_price(depart, ret):
+                params = search_params(from_loc, to_loc, depart, ret, currency, adults, children, cabin_class)
+                best = rank_offers(normalize_offers(iter_flight_offers(fetch_flights(params, headers)), currency),
+                                   top_n=1, nonstop_only=nonstop_only)
+                return best[0].price if best else None
+
+            # ✅ Days already priced for this route in this session are not re-fetched
+            route_key = (from_loc, to_loc, currency, adults, children, cabin_class, nonstop_only)
+            flex_prices = st.session_state.setdefault("flex_prices", {}).setdefault(route_key, {})
+            depart_dates = date_window(depart_date, flex_days)
+            return_dates = date_window(return_date, flex_days) if return_date else None
+            failed = []
+            flexible_search(cheapest_price, depart_dates, return_dates, known=flex_prices, errors=failed)
 
+            st.subheader(f"📅 {from_loc} → {to_loc} cheapest {currency} fares by date")
+            st.table(price_calendar(flex_prices, depart_dates, return_dates))
+            if failed:
+                st.error(f"Error: {len(failed)} date(s) could not be priced ({failed[0][1]})")
         except Exception as e:
             st.error(f"Error: {str(e)}")
-            if session:
-                session.rollback()
-        finally:
-            if session:
-                session.close()
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Shared HTTP client for every upstream call (RapidAPI providers and the Flask API).
+
+One pooled requests.Session keeps connections (and TLS sessions) alive across
+searches. Each host gets its own pool size. Every request gets connect/read
+timeouts. Idempotent requests are retried with jittered exponential backoff
+on connection errors, 429 and 5xx. A per-host circuit breaker fails fast
+while a host keeps erroring.
+"""
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Connections kept open per host (everything else uses DEFAULT_POOL_SIZE)
+DEFAULT_POOL_SIZE = 10
+POOL_SIZES = {
+    "https://booking-com15.p.rapidapi.com": 32,
+    "https://skyscanner-api.p.rapidapi.com": 16,
+    "https://realtime.oxylabs.io": 8,
+    "http://127.0.0.1:5000": 16,
+}
+
+BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))  # consecutive failures to open
+BREAKER_RESET_SECONDS = float(os.getenv("HTTP_BREAKER_RESET", "30"))
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without calling the host while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after N consecutive failures; lets one trial request through after a cool-down."""
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.opened_at = time.monotonic()  # ✅ Half-open: one trial, others keep failing fast
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.max_failures:
+                self.opened_at = time.monotonic()
+
+
+def _retry_policy():
+    options = dict(total=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR, status_forcelist=RETRY_STATUSES,
+                   respect_retry_after_header=True, raise_on_status=False)
+    try:
+        return Retry(backoff_jitter=BACKOFF_JITTER, **options)
+    except TypeError:  # urllib3 < 2 has no jitter option
+        return Retry(**options)
+
+
+def make_session():
+    session = requests.Session()
+    # Never share cookies between Streamlit users through the pooled session
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    retry = _retry_policy()
+    session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=DEFAULT_POOL_SIZE, max_retries=retry))
+    session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=DEFAULT_POOL_SIZE, max_retries=retry))
+    for prefix, size in POOL_SIZES.items():
+        session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=retry))
+    return session
+
+
+_session = make_session()
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(url):
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+
+def request(method, url, timeout=None, **kwargs):
+    """Sends a request through the shared session, honoring the host's circuit breaker."""
+    breaker = breaker_for(url)
+    if not breaker.allow():
+        raise CircuitOpenError(f"circuit open for {urlsplit(url).netloc}; not calling upstream")
+    try:
+        response = _session.request(method, url, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+    if response.status_code in RETRY_STATUSES:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request("PUT", url, **kwargs)
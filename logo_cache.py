@@ -0,0 +1,150 @@
+"""
+Local cache for airline logos shown on the result cards.
+
+Each logo is downloaded once, resized to the 50px display size and stored on
+disk as <carrier code>.png. The disk tier is capped at LOGO_CACHE_MAX_BYTES,
+and the least recently used files are evicted first. Logos that have been read
+once are then served from memory. Concurrent misses for the same carrier share
+one download. If a logo can't be fetched, the card falls back to the remote URL,
+and the failure is remembered for LOGO_FAILURE_TTL seconds so later renders
+don't retry the download.
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+
+import http_client
+from search_cache import TTLCache
+from single_flight import SingleFlight
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow missing: logos are cached at their original size
+    Image = None
+
+LOGO_CACHE_DIR = os.getenv("LOGO_CACHE_DIR", ".logo_cache")
+LOGO_CACHE_MAX_BYTES = int(os.getenv("LOGO_CACHE_MAX_BYTES", str(20 * 1024 * 1024)))
+LOGO_MEMORY_ENTRIES = int(os.getenv("LOGO_MEMORY_ENTRIES", "512"))
+LOGO_FAILURE_TTL = int(os.getenv("LOGO_FAILURE_TTL", "300"))  # seconds; 0 retries failed logos every time
+LOGO_SIZE = 50  # px, the width st.image renders logos at
+
+_FAILED = object()  # memory-tier marker for a logo that recently failed to download
+
+
+def resize_logo(data, size=LOGO_SIZE):
+    """Shrinks an image to fit size x size and re-encodes it as PNG."""
+    if Image is None:
+        return data
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        out = io.BytesIO()
+        image.save(out, format="PNG", optimize=True)
+        return out.getvalue()
+
+
+class LogoCache:
+    """Memory LRU in front of a size-capped on-disk cache keyed by carrier code."""
+
+    def __init__(self, cache_dir=LOGO_CACHE_DIR, max_bytes=LOGO_CACHE_MAX_BYTES,
+                 memory_entries=LOGO_MEMORY_ENTRIES, size=LOGO_SIZE, failure_ttl=LOGO_FAILURE_TTL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.size = size
+        self.failure_ttl = failure_ttl
+        self._memory = TTLCache(ttl=0, max_entries=memory_entries)  # ttl=0: never expires
+        self._downloads = SingleFlight()
+        self._disk_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "downloads": 0, "errors": 0, "failure_hits": 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _key(self, carrier_code, url):
+        code = re.sub(r"[^A-Za-z0-9]", "", carrier_code or "").upper()
+        return code or hashlib.sha1(url.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get(self, carrier_code, url):
+        """Returns the resized logo as PNG bytes, or None when it can't be fetched."""
+        if not url:
+            return None
+        key = self._key(carrier_code, url)
+        data = self._memory.get(key)
+        if data is _FAILED:
+            self._count("failure_hits")
+            return None
+        if data is not None:
+            self._count("memory_hits")
+            return data
+        try:
+            data, _ = self._downloads.do(key, lambda: self._load(key, url))
+        except Exception as e:
+            self._count("errors")
+            print(f"⚠️ Could not cache logo {url}: {e}")
+            if self.failure_ttl:
+                self._memory.set(key, _FAILED, ttl=self.failure_ttl)  # ✅ Short-lived, so the logo is retried later
+            return None
+        self._memory.set(key, data)
+        return data
+
+    def _load(self, key, url):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+            os.utime(path)  # ✅ mtime doubles as the LRU timestamp for eviction
+            self._count("disk_hits")
+            return data
+        except FileNotFoundError:
+            pass
+
+        response = http_client.get(url)
+        response.raise_for_status()
+        data = resize_logo(response.content, self.size)
+        self._count("downloads")
+        with self._disk_lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)  # atomic, so readers never see a partial file
+            self._evict()
+        return data
+
+    def _evict(self):
+        """Deletes least recently used logos until the directory fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # already evicted by another process
+            total -= size
+
+    def clear_memory(self):
+        self._memory.clear()
+
+
+logo_cache = LogoCache()
+
+
+def logo_image(leg):
+    """What st.image should show for a leg's logo: cached bytes, else the remote URL."""
+    if not leg.logo:
+        return None
+    return logo_cache.get(leg.carrier_code, leg.logo) or leg.logo
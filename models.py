@@ -0,0 +1,142 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import declarative_base, relationship
+from datetime import datetime, timezone
+from passwords import hash_password, verify
+
+Base = declarative_base()
+
+# ✅ Users Table
+class User(Base):
+    __tablename__ = "users"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    email = Column(String, unique=True, nullable=False)
+    password_hash = Column(String, nullable=False)
+    full_name = Column(String, nullable=False)
+    gender = Column(String, nullable=True)
+    flight_type = Column(String, nullable=True)  # Nonstop or Any
+    currency = Column(String, nullable=True)  # USD or CAD
+    market = Column(String, nullable=True)  # Market Region (US, CA, etc.)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    # Relationships:
+    subscriptions = relationship("Subscription", back_populates="user", cascade="all, delete-orphan")
+    flight_searches = relationship("FlightSearch", back_populates="user", cascade="all, delete-orphan")
+    alerts = relationship("Alert", back_populates="user", cascade="all, delete-orphan")
+
+    def set_password(self, password):
+        """Hashes and sets the password"""
+        self.password_hash = hash_password(password)
+
+    def check_password(self, password):
+        """Validates a password against the stored hash"""
+        return verify(self.password_hash, password)[0]
+
+# ✅ Subscription Table
+class Subscription(Base):
+    __tablename__ = "subscriptions"
+
+    subscription_id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    plan_name = Column(String, nullable=False)
+    start_date = Column(DateTime, nullable=False)
+    end_date = Column(DateTime, nullable=True)
+    status = Column(String, nullable=False)
+    price = Column(Float, nullable=False)
+    payment_method = Column(String, nullable=True)
+    subscription_type = Column(String, nullable=True)
+
+    user = relationship("User", back_populates="subscriptions")
+
+# ✅ Flight Search Table
+class FlightSearch(Base):
+    __tablename__ = 'flight_search'
+    __table_args__ = (
+        # "Recent searches for this route/date": equality on the route, newest first
+        Index('ix_flight_search_route_date', 'origin', 'destination', 'departure_date', 'created_at'),
+        Index('ix_flight_search_user_created', 'user_id', 'created_at'),
+    )
+
+    search_id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    origin = Column(String, nullable=False)
+    destination = Column(String, nullable=False)
+    departure_date = Column(DateTime, nullable=False)
+    return_date = Column(DateTime, nullable=True)
+    trip_type = Column(String, nullable=False)  # One-way or Round-trip
+    cabin_class = Column(String, nullable=True)  # ECONOMY, PREMIUM_ECONOMY, BUSINESS or FIRST
+    currency = Column(String, nullable=True)  # currency the results were priced in
+    adults = Column(Integer, nullable=True)
+    children = Column(Integer, nullable=True)
+    search_URL = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    user = relationship("User", back_populates="flight_searches")
+    flight_results = relationship("FlightResult", back_populates="search", cascade="all, delete-orphan")
+    alerts = relationship("Alert", back_populates="search", cascade="all, delete-orphan")
+
+# ✅ Flight Results Table
+class FlightResult(Base):
+    __tablename__ = 'flight_results'
+    __table_args__ = (
+        # Results of a search (the FK join), covering price and retrieval time for price history
+        Index('ix_flight_results_search_price', 'search_id', 'price', 'retrieved_at'),
+    )
+
+    result_id = Column(Integer, primary_key=True, autoincrement=True)
+    search_id = Column(Integer, ForeignKey('flight_search.search_id'), nullable=False)
+    airline = Column(String, nullable=False)
+    price = Column(Float, nullable=False)
+    flight_number = Column(String, nullable=True)
+    departure_time = Column(DateTime, nullable=True)
+    arrival_time = Column(DateTime, nullable=True)
+    duration = Column(String, nullable=False)
+    stops = Column(Integer, nullable=True)
+    booking_url = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    retrieved_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    search = relationship("FlightSearch", back_populates="flight_results")
+
+# ✅ Alerts Table
+class Alert(Base):
+    __tablename__ = 'alerts'
+    __table_args__ = (
+        Index('ix_alerts_user_triggered', 'user_id', 'alert_triggered'),
+        Index('ix_alerts_search_id', 'search_id'),
+    )
+
+    alert_id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    search_id = Column(Integer, ForeignKey('flight_search.search_id'), nullable=False)
+    alert_type = Column(String, nullable=False)  # e.g., "Price Drop", "Availability Change"
+    price_change = Column(Float, nullable=True)
+    alert_triggered = Column(Boolean, default=False)
+    triggered_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    user = relationship("User", back_populates="alerts")
+    search = relationship("FlightSearch", back_populates="alerts")
+
+# ✅ Price History Table (one row per route/date/cabin/currency and hour)
+class PriceHistory(Base):
+    __tablename__ = 'price_history'
+    __table_args__ = (
+        UniqueConstraint('origin', 'destination', 'departure_date', 'cabin_class', 'currency', 'bucket_start',
+                         name='uq_price_history_bucket'),
+    )
+
+    history_id = Column(Integer, primary_key=True, autoincrement=True)
+    origin = Column(String, nullable=False)
+    destination = Column(String, nullable=False)
+    departure_date = Column(Date, nullable=False)
+    cabin_class = Column(String, nullable=False)
+    currency = Column(String, nullable=False)
+    bucket_start = Column(DateTime, nullable=False)  # start of the hour (UTC)
+    min_price = Column(Float, nullable=False)
+    median_price = Column(Float, nullable=False)
+    max_price = Column(Float, nullable=False)
+    sample_count = Column(Integer, nullable=False, default=0)
+    samples = Column(String, nullable=False, default="[]")  # sorted [price, weight] samples (JSON)
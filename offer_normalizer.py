@@ -0,0 +1,138 @@
+"""
+Turns raw Booking.com searchFlights offers into compact Offer/Leg records.
+
+normalize_offers() is a generator, so callers (the Streamlit UI, the DB writer,
+batch jobs) only pay for the offers they actually consume. The per-leg work is
+kept small: timestamps go through datetime.fromisoformat, durations stay integer
+seconds until a card renders them, and luggage summaries are shared strings
+memoized per allowance shape.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+
+def parse_datetime(date_str):
+    """'2025-03-05T13:45:00' -> naive local datetime (None when missing, malformed, date-only or offset-aware)."""
+    try:
+        value = datetime.fromisoformat(date_str)  # ✅ C-level parser; strptime is ~10x slower
+    except (TypeError, ValueError):
+        return None
+    # fromisoformat is laxer than the API's format: mixing in dates or aware datetimes
+    # would break leg arithmetic and the departure-window filters
+    if date_str[10:11] != "T" or value.tzinfo is not None:
+        return None
+    return value
+
+
+@lru_cache(maxsize=4096)
+def format_duration(seconds):
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    return f"{int(hours)}h {int(minutes):02d}m"
+
+
+def _pieces(items):
+    pieces = 0
+    for item in items or ():
+        allowance = item.get('luggageAllowance')
+        if allowance:
+            pieces += allowance.get('maxPiece', 0)
+    return pieces
+
+
+@lru_cache(maxsize=256)
+def _luggage_summary(checked, cabin):
+    return f"{checked} checked, {cabin} cabin"
+
+
+def get_luggage(segment):
+    """'2 checked, 1 cabin' for a segment; one cached string per (checked, cabin) shape."""
+    return _luggage_summary(_pieces(segment.get('travellerCheckedLuggage')),
+                            _pieces(segment.get('travellerCabinLuggage')))
+
+
+@dataclass(slots=True)
+class Leg:
+    """One direction of an offer (outbound or return segment)."""
+    airline: str
+    flight_num: str
+    logo: str
+    departure: datetime
+    arrival: datetime
+    total_time: int  # seconds, as reported by the API
+    stops: int
+    luggage: str
+    from_city: str
+    to_city: str
+    carrier_code: str = ""  # IATA code of the operating carrier, e.g. "AC"
+
+    @property
+    def duration(self):
+        """'13h 05m', formatted only when a card displays it."""
+        return format_duration(self.total_time)
+
+
+@dataclass(slots=True)
+class Offer:
+    """A normalized flight offer: price plus outbound and optional return leg."""
+    price: float
+    currency: str
+    outbound: Leg
+    inbound: Leg
+    booking_url: str
+    provider: str = "booking"
+    token: str = ""  # provider's offer token, used to build a deep link to this exact offer
+
+
+def normalize_leg(segment):
+    """Builds a Leg from a raw segment (raises KeyError/IndexError on bad data)."""
+    first_leg = segment['legs'][0]
+    carrier = first_leg['carriersData'][0]
+    return Leg(
+        airline=carrier.get('name', 'Unknown'),
+        flight_num=first_leg.get('flightInfo', {}).get('flightNumber', ''),
+        logo=carrier.get('logo', ''),
+        departure=parse_datetime(segment['departureTime']),
+        arrival=parse_datetime(segment['arrivalTime']),
+        total_time=segment['totalTime'],
+        stops=len(segment['legs']) - 1,
+        luggage=get_luggage(segment),
+        from_city=segment.get('departureAirport', {}).get('cityName', ''),
+        to_city=segment.get('arrivalAirport', {}).get('cityName', ''),
+        carrier_code=carrier.get('code', ''),
+    )
+
+
+def offer_price(offer):
+    """Total price of one raw flightOffers element (raises KeyError/TypeError on bad data)."""
+    price_data = offer['priceBreakdown']['total']
+    return price_data['units'] + price_data['nanos'] / 1e9
+
+
+def normalize_offer(offer, currency="USD", fallback_url=""):
+    """Builds an Offer from one raw flightOffers element."""
+    price_data = offer['priceBreakdown']['total']
+    segments = offer['segments']
+    return Offer(
+        price=offer_price(offer),
+        currency=price_data.get('currencyCode', currency),
+        outbound=normalize_leg(segments[0]),
+        inbound=normalize_leg(segments[1]) if len(segments) > 1 else None,
+        booking_url=offer.get('deepLink') or fallback_url,
+        token=offer.get('token', ''),
+    )
+
+
+def iter_flight_offers(data):
+    """Yields the raw flightOffers elements from a searchFlights response."""
+    return iter((data.get("data") or {}).get("flightOffers") or [])
+
+
+def normalize_offers(offers, currency="USD", fallback_url=""):
+    """Lazily normalizes raw offers, skipping any that are missing required fields."""
+    for offer in offers:
+        try:
+            yield normalize_offer(offer, currency, fallback_url)
+        except (KeyError, IndexError, TypeError):
+            continue
@@ -0,0 +1,141 @@
+"""
+Incremental parser for the flightOffers array of a searchFlights response.
+
+Instead of materializing the whole body with response.json(), iter_stream_offers()
+reads the body chunk by chunk and yields each flightOffers element as soon as its
+closing brace arrives. Only the offer currently being read (plus one chunk) is held
+in memory, and the buffer is capped at MAX_OFFER_BYTES.
+"""
+import codecs
+import json
+import os
+
+CHUNK_SIZE = 64 * 1024
+MAX_OFFER_BYTES = int(os.getenv("STREAM_MAX_OFFER_BYTES", str(2 * 1024 * 1024)))
+
+_WHITESPACE = " \t\r\n"
+_decoder = json.JSONDecoder()
+
+
+class _ValueScanner:
+    """Finds where a JSON value ends, resuming across chunks."""
+
+    def __init__(self):
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def scan(self, buf):
+        """Returns the end index of the value starting at buf[0], or None if incomplete."""
+        i = self.pos
+        n = len(buf)
+        while i < n:
+            ch = buf[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+            i += 1
+        self.pos = i
+        return None
+
+
+def _exceeds(text, max_bytes):
+    """True when text is longer than max_bytes once UTF-8 encoded."""
+    if len(text) > max_bytes:
+        return True
+    if len(text) * 4 <= max_bytes:  # ✅ UTF-8 is at most 4 bytes per char: no need to encode
+        return False
+    return len(text.encode("utf-8", "surrogatepass")) > max_bytes
+
+
+def _decode_chunks(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        if chunk:
+            yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_stream_offers(chunks, key="flightOffers", max_offer_bytes=MAX_OFFER_BYTES):
+    """Yields the elements of the first `key` array found in a stream of JSON chunks."""
+    marker = f'"{key}"'
+    buf = ""
+    state = "seek_key"  # seek_key -> seek_array -> in_array -> done
+    scanner = None
+
+    for text in _decode_chunks(chunks):
+        buf += text
+        while True:
+            if state == "seek_key":
+                idx = buf.find(marker)
+                if idx == -1:
+                    buf = buf[-len(marker):]  # ✅ Keep only what could be a split marker
+                    break
+                buf = buf[idx + len(marker):]
+                state = "seek_array"
+
+            if state == "seek_array":
+                buf = buf.lstrip(_WHITESPACE)
+                if not buf:
+                    break
+                if buf[0] == ":":
+                    buf = buf[1:]
+                    continue
+                if buf[0] != "[":
+                    # The key appeared as a value or the field is null; keep looking
+                    state = "seek_key"
+                    continue
+                buf = buf[1:]
+                state = "in_array"
+
+            if state == "in_array":
+                if scanner is None:
+                    buf = buf.lstrip(_WHITESPACE + ",")
+                    if not buf:
+                        break
+                    if buf[0] == "]":
+                        state = "done"
+                        break
+                    scanner = _ValueScanner()
+                end = scanner.scan(buf)
+                value = buf[:end] if end else buf
+                if _exceeds(value, max_offer_bytes):
+                    raise ValueError(f"flight offer exceeds {max_offer_bytes} bytes while streaming")
+                if end is None:
+                    break
+                offer, _ = _decoder.raw_decode(value)
+                buf = buf[end:]
+                scanner = None
+                yield offer
+                continue
+
+            break
+
+        if state == "done":
+            return
+
+    if state == "in_array":
+        raise ValueError("response ended before the flightOffers array was closed")
+
+
+def iter_response_offers(response, chunk_size=CHUNK_SIZE, key="flightOffers"):
+    """Streams offers from a requests response opened with stream=True, then closes it."""
+    try:
+        yield from iter_stream_offers(response.iter_content(chunk_size=chunk_size), key=key)
+    finally:
+        response.close()  # ✅ Stop downloading once the caller has enough offers
@@ -0,0 +1,116 @@
+"""
+Password hashing shared by the Flask API and the Streamlit login tab.
+
+New hashes use PASSWORD_HASH_METHOD, a werkzeug method string that carries its
+own work factor, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000". verify()
+also accepts hashes made with older settings. That includes the unsalted
+sha256 hex digests the Streamlit sign-up tab used to store. For those it
+reports that a rehash is needed, so logins upgrade hashes transparently.
+
+Hashing is CPU-heavy by design. The *_async helpers run it on a bounded pool
+(PASSWORD_WORKERS threads). A burst of logins then can't take every CPU away
+from the other Flask requests. hashlib releases the GIL while hashing. At most
+PASSWORD_QUEUE_SIZE hashes wait for a worker; beyond that, or when a hash takes
+longer than PASSWORD_TIMEOUT, PasswordPoolBusy is raised so the API can answer
+503 instead of piling up requests.
+"""
+import hashlib
+import hmac
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(max((os.cpu_count() or 2) // 2, 1))))
+PASSWORD_TIMEOUT = float(os.getenv("PASSWORD_TIMEOUT", "10"))  # seconds a request waits for the pool
+PASSWORD_QUEUE_SIZE = int(os.getenv("PASSWORD_QUEUE_SIZE", "64"))  # hashes waiting for a worker
+
+_LEGACY_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+_slots = threading.BoundedSemaphore(PASSWORD_WORKERS + PASSWORD_QUEUE_SIZE)  # running + queued
+
+
+class PasswordPoolBusy(Exception):
+    """The hashing pool is full, or a hash didn't finish within the timeout."""
+
+
+def hash_password(password, method=PASSWORD_HASH_METHOD):
+    return generate_password_hash(password, method=method)
+
+
+@lru_cache(maxsize=64)
+def parse_method(method):
+    """'scrypt' / 'scrypt:32768:8:1' / 'pbkdf2:sha256' -> the full parameters, with werkzeug's defaults filled in."""
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return name, n, r, p
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return name, hash_name, iterations
+    return (name, *args)
+
+
+def needs_rehash(stored_hash, method=PASSWORD_HASH_METHOD):
+    """True when stored_hash wasn't made with the current method and work factor."""
+    try:
+        return parse_method(stored_hash.split("$", 1)[0]) != parse_method(method)
+    except ValueError:  # malformed parameters in the stored hash
+        return True
+
+
+def verify(stored_hash, password, method=PASSWORD_HASH_METHOD):
+    """Returns (matches, needs_rehash) for a password against any supported stored hash."""
+    if not stored_hash or password is None:
+        return False, False
+    if _LEGACY_SHA256.match(stored_hash):  # unsalted sha256 from the old Streamlit sign-up tab
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored_hash), True
+    try:
+        matches = check_password_hash(stored_hash, password)
+    except ValueError:  # unknown or malformed hash format
+        return False, False
+    return matches, matches and needs_rehash(stored_hash, method)
+
+
+def _submit(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordPoolBusy(f"password pool full ({PASSWORD_QUEUE_SIZE} hashes queued)")
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())  # also runs when cancelled
+    return future
+
+
+def _wait(future, timeout):
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()  # ✅ Drops it if still queued; a hash already running can't be interrupted
+        raise PasswordPoolBusy(f"password hash took longer than {timeout}s") from None
+
+
+def hash_password_async(password, method=PASSWORD_HASH_METHOD):
+    return _submit(hash_password, password, method)
+
+
+def verify_async(stored_hash, password, method=PASSWORD_HASH_METHOD):
+    return _submit(verify, stored_hash, password, method)
+
+
+def hash_in_pool(password, timeout=PASSWORD_TIMEOUT):
+    """hash_password() on the bounded pool; raises PasswordPoolBusy when overloaded."""
+    return _wait(hash_password_async(password), timeout)
+
+
+def verify_in_pool(stored_hash, password, timeout=PASSWORD_TIMEOUT):
+    """verify() on the bounded pool; returns (matches, needs_rehash). Raises PasswordPoolBusy when overloaded."""
+    return _wait(verify_async(stored_hash, password), timeout)
@@ -0,0 +1,43 @@
+"""
+Bulk persistence of normalized offers into the flight_results table.
+
+save_flight_results() turns every Offer of a search into a plain row dict and
+writes them with a single Core INSERT executed as executemany, instead of one
+ORM object (and one identity-map entry) per offer.
+"""
+from datetime import datetime, timezone
+
+from create_db import FlightResult
+from offer_normalizer import format_duration
+
+
+def offer_to_row(offer, search_id, retrieved_at=None):
+    """Maps an Offer onto the columns of FlightResult."""
+    retrieved_at = retrieved_at or datetime.now(timezone.utc)
+    legs = (offer.outbound, offer.inbound) if offer.inbound else (offer.outbound,)
+    airlines = []
+    for leg in legs:
+        if leg.airline not in airlines:
+            airlines.append(leg.airline)
+    return {
+        "search_id": search_id,
+        "airline": " / ".join(airlines),
+        "price": offer.price,
+        "flight_number": " / ".join(str(leg.flight_num) for leg in legs if leg.flight_num),
+        "departure_time": offer.outbound.departure,
+        "arrival_time": offer.outbound.arrival,
+        "duration": format_duration(sum(leg.total_time for leg in legs)),
+        "stops": sum(leg.stops for leg in legs),
+        "booking_url": offer.booking_url,
+        "created_at": retrieved_at,
+        "retrieved_at": retrieved_at,
+    }
+
+
+def save_flight_results(session, search_id, offers, retrieved_at=None):
+    """Inserts all offers for a search in one executemany; the caller commits."""
+    retrieved_at = retrieved_at or datetime.now(timezone.utc)
+    rows = [offer_to_row(offer, search_id, retrieved_at) for offer in offers]
+    if rows:
+        session.execute(FlightResult.__table__.insert(), rows)
+    return len(rows)
@@ -0,0 +1,116 @@
+"""
+Hourly price-history aggregates per route, departure date, cabin and currency.
+
+record_prices() folds the prices of one search into the current hour's
+PriceHistory row (min/max exactly, median from a bounded set of weighted
+samples, each standing for the number of prices it summarizes), so
+price_series() only ever reads one row per hour instead of scanning raw
+flight_results.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+
+from create_db import PriceHistory
+
+MAX_SAMPLES = 64  # weighted samples kept per hour bucket to estimate the median
+
+
+def hour_bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def compress(samples, size=MAX_SAMPLES):
+    """Shrinks sorted [price, weight] samples to `size` equal-weight quantiles (total weight is kept)."""
+    if len(samples) <= size:
+        return samples
+    total = sum(weight for _, weight in samples)
+    step = total / size
+    compressed = []
+    cumulative = 0.0
+    index = 0
+    for k in range(size):
+        target = (k + 0.5) * step  # midpoint of the k-th quantile slice
+        while cumulative + samples[index][1] < target:
+            cumulative += samples[index][1]
+            index += 1
+        compressed.append([samples[index][0], step])
+    return compressed
+
+
+def weighted_median(samples):
+    """Median of sorted [price, weight] samples."""
+    half = sum(weight for _, weight in samples) / 2
+    cumulative = 0.0
+    for index, (price, weight) in enumerate(samples):
+        cumulative += weight
+        if cumulative > half:
+            return price
+        if cumulative == half:  # exactly between two samples, as with an even count of prices
+            return (price + samples[index + 1][0]) / 2
+    return samples[-1][0]
+
+
+def load_samples(bucket):
+    """[price, weight] samples of a bucket; plain prices (older rows) share its sample_count evenly."""
+    samples = json.loads(bucket.samples)
+    if samples and not isinstance(samples[0], list):
+        weight = bucket.sample_count / len(samples)
+        samples = [[price, weight] for price in samples]
+    return samples
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def record_prices(session, origin, destination, departure_date, cabin_class, currency, prices, observed_at=None):
+    """Merges one search's prices into its hourly bucket; the caller commits."""
+    prices = sorted(price for price in prices if price is not None)
+    if not prices:
+        return None
+    bucket_start = hour_bucket(observed_at or datetime.now(timezone.utc))
+    key = {
+        "origin": origin,
+        "destination": destination,
+        "departure_date": _as_date(departure_date),
+        "cabin_class": cabin_class,
+        "currency": currency,
+        "bucket_start": bucket_start,
+    }
+    new_samples = compress([[price, 1] for price in prices])
+    bucket = session.query(PriceHistory).filter_by(**key).first()
+    if bucket is None:
+        bucket = PriceHistory(min_price=prices[0], max_price=prices[-1], sample_count=len(prices),
+                              median_price=weighted_median(new_samples), samples=json.dumps(new_samples), **key)
+        session.add(bucket)
+        return bucket
+
+    # ✅ Each sample carries the number of prices it stands for, so one search can't outweigh the hour
+    samples = compress(sorted(load_samples(bucket) + new_samples))
+    bucket.min_price = min(bucket.min_price, prices[0])
+    bucket.max_price = max(bucket.max_price, prices[-1])
+    bucket.sample_count += len(prices)
+    bucket.median_price = weighted_median(samples)
+    bucket.samples = json.dumps(samples)
+    return bucket
+
+
+def price_series(session, origin, destination, departure_date, cabin_class, currency=None, days=30):
+    """Returns hourly {hour, min, median, max, count} points for the last `days` days."""
+    since = hour_bucket(datetime.now(timezone.utc) - timedelta(days=days))
+    query = session.query(
+        PriceHistory.bucket_start, PriceHistory.min_price, PriceHistory.median_price,
+        PriceHistory.max_price, PriceHistory.sample_count,
+    ).filter(
+        PriceHistory.origin == origin,
+        PriceHistory.destination == destination,
+        PriceHistory.departure_date == _as_date(departure_date),
+        PriceHistory.cabin_class == cabin_class,
+        PriceHistory.bucket_start >= since,
+    )
+    if currency:
+        query = query.filter(PriceHistory.currency == currency)
+    return [
+        {"hour": row[0], "min": row[1], "median": row[2], "max": row[3], "count": row[4]}
+        for row in query.order_by(PriceHistory.bucket_start)
+    ]
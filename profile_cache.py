@@ -0,0 +1,99 @@
+"""
+In-process cache of user profile records for GET /profile.
+
+Profiles are cached by user_id in a bounded LRU. Entries expire after
+PROFILE_CACHE_TTL seconds, which bounds staleness across API worker processes.
+PUT /profile writes the updated record through to the cache after its commit,
+so the worker that handled the update never serves the old one. Each record
+carries the row's updated_at, and an entry is never replaced by an older record,
+so a GET miss that raced a PUT can't cache the pre-update profile. The hit/miss
+counters are served to signed-in users by GET /profile/cache_stats.
+"""
+import os
+import threading
+from datetime import datetime
+
+from search_cache import TTLCache
+
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "300"))  # 0 = never expire
+
+
+def profile_record(user):
+    """The User columns profile endpoints need, as a plain dict (safe to share between requests)."""
+    return {
+        "user_id": user.user_id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "flight_type": user.flight_type,
+        "currency": user.currency,
+        "market": user.market,
+        "updated_at": user.updated_at,  # version: an entry is only replaced by a record at least as new
+    }
+
+
+def _version(record):
+    updated_at = record["updated_at"] or datetime.min
+    return updated_at.replace(tzinfo=None)  # SQLite hands back naive UTC; compare like with like
+
+
+class ProfileCache:
+    """LRU of profile records keyed by user_id, with an email -> user_id index."""
+
+    def __init__(self, max_entries=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL):
+        self._profiles = TTLCache(ttl=ttl, max_entries=max_entries)
+        self._ids_by_email = TTLCache(ttl=ttl, max_entries=max_entries)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "stale_loads": 0, "invalidations": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, user_id=None, email=None, load=None):
+        """Cached profile for user_id (or email); on a miss, load() -> User or None fills the cache."""
+        if user_id is None and email is not None:
+            user_id = self._ids_by_email.get(email)
+        record = self._profiles.get(user_id) if user_id is not None else None
+        if record is not None:
+            self._count("hits")
+            return record
+        self._count("misses")
+        user = load() if load else None
+        if user is None:
+            return None
+        return self._store(profile_record(user))
+
+    def set(self, user):
+        """Write-through: stores the current state of user (call after committing it)."""
+        return self._store(profile_record(user))
+
+    def _store(self, record):
+        """Caches record unless a newer version is already cached; returns the record kept."""
+        with self._write_lock:
+            # ✅ A GET miss that read the row before a PUT committed can't overwrite the PUT's record
+            current = self._profiles.get(record["user_id"])
+            if current is not None and _version(current) > _version(record):
+                self._count("stale_loads")
+                return current
+            self._profiles.set(record["user_id"], record)
+            self._ids_by_email.set(record["email"], record["user_id"])
+        self._count("writes")
+        return record
+
+    def invalidate(self, user_id):
+        self._profiles.delete(user_id)
+        self._count("invalidations")
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+        stats["size"] = len(self._profiles)
+        return stats
+
+
+# ✅ One cache per API process
+profile_cache = ProfileCache()
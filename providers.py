@@ -0,0 +1,437 @@
+"""
+Flight providers behind one interface, queried in parallel and merged.
+
+Each provider adapter turns its API's response into the same Offer/Leg records
+as offer_normalizer. search_providers() queries every enabled provider at once
+and reports partial merges as providers stream them in. Each provider has its
+own deadline, so a slow one is skipped rather than waited on. Identical
+itineraries (carrier, flight numbers, times) are merged, keeping the cheapest.
+"""
+import asyncio
+import os
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import http_client
+from booking_api import RAPIDAPI_KEY, fetch_flight_offers, rapidapi_headers, search_params
+from offer_normalizer import Leg, Offer, normalize_offers
+from write_behind import search_writer
+
+# Comma-separated provider names to query, e.g. "booking,skyscanner,oxylabs"
+ENABLED_PROVIDERS = [name.strip() for name in os.getenv("FLIGHT_PROVIDERS", "booking").split(",") if name.strip()]
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("PROVIDER_WORKERS", "16")), thread_name_prefix="provider")
+
+# Per-provider outcomes reported by iter_providers(status=...)
+COMPLETE, PARTIAL, FAILED, TIMED_OUT = "complete", "partial", "failed", "timed_out"
+
+# Offers a streaming provider normalizes between progress snapshots
+PROGRESS_BATCH = int(os.getenv("PROVIDER_PROGRESS_BATCH", "25"))
+
+
+class IncompleteSearch(Exception):
+    """A provider stopped (e.g. at its deadline) before its results were complete."""
+
+
+class FlightProvider:
+    """Base class: search(query) returns a list of Offer records."""
+    name = "provider"
+    deadline = 20.0  # seconds search_providers() waits for this provider
+    records_history = True  # complete results feed the price history (once per upstream search)
+
+    def search(self, query):
+        raise NotImplementedError
+
+    def iter_search(self, query):
+        """Yields growing snapshots of this provider's offers; the last one is the full result."""
+        yield self.search(query)
+
+
+class BookingProvider(FlightProvider):
+    """Booking.com searchFlights via RapidAPI (flights_app.py's original source)."""
+    name = "booking"
+    records_history = False  # booking_api records each upstream response itself, skipping cache hits
+    deadline = float(os.getenv("BOOKING_DEADLINE", "20"))
+
+    def offers(self, query):
+        """Yields normalized offers; with STREAM_PARSE on, while the body is still downloading."""
+        params = search_params(query["from_loc"], query["to_loc"], query["depart_date"], query["return_date"],
+                               query["currency"], query["adults"], query["children"], query["cabin_class"])
+        fallback_url = f"https://flights.booking.com/flights/{query['from_loc']}-{query['to_loc']}/"
+        return normalize_offers(fetch_flight_offers(params, rapidapi_headers()), query["currency"], fallback_url)
+
+    def search(self, query):
+        return list(self.offers(query))
+
+    def iter_search(self, query):
+        offers = []
+        for offer in self.offers(query):
+            offers.append(offer)
+            if len(offers) % PROGRESS_BATCH == 0:
+                yield offers[:]
+        yield offers
+
+
+def _sky_datetime(value):
+    if not value:
+        return None
+    try:
+        return datetime(value["year"], value["month"], value["day"], value.get("hour", 0), value.get("minute", 0))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class SkyscannerProvider(FlightProvider):
+    """Skyscanner live prices: create a session, then poll until complete."""
+    name = "skyscanner"
+    deadline = float(os.getenv("SKYSCANNER_DEADLINE", "25"))
+    host = "skyscanner-api.p.rapidapi.com"
+    # Adaptive polling: poll fast while new itineraries keep arriving, back off while nothing changes
+    poll_min_interval = float(os.getenv("SKYSCANNER_POLL_MIN", "0.5"))
+    poll_max_interval = float(os.getenv("SKYSCANNER_POLL_MAX", "4"))
+    poll_backoff = 1.6
+
+    def headers(self):
+        return {"x-rapidapi-key": RAPIDAPI_KEY or "", "x-rapidapi-host": self.host,
+                "Content-Type": "application/json"}
+
+    def create_payload(self, query):
+        def leg(origin, destination, day):
+            return {"originPlaceId": {"iata": origin}, "destinationPlaceId": {"iata": destination},
+                    "date": {"year": day.year, "month": day.month, "day": day.day}}
+
+        legs = [leg(query["from_loc"], query["to_loc"], query["depart_date"])]
+        if query["return_date"]:
+            legs.append(leg(query["to_loc"], query["from_loc"], query["return_date"]))
+        return {"query": {
+            "market": query.get("market", "US"),
+            "locale": "en-US",
+            "currency": query["currency"],
+            "adults": query["adults"],
+            "childrenAges": [17] * query["children"],
+            "cabinClass": f"CABIN_CLASS_{query['cabin_class']}",
+            "queryLegs": legs,
+        }}
+
+    def create(self, query):
+        response = http_client.post(f"https://{self.host}/v3/flights/live/itineraryrefresh/create",
+                                    json=self.create_payload(query), headers=self.headers())
+        response.raise_for_status()
+        return response.json()
+
+    def poll(self, token):
+        response = http_client.get(f"https://{self.host}/v3/flights/live/itineraryrefresh/poll/{token}",
+                                   headers=self.headers())
+        response.raise_for_status()
+        return response.json()
+
+    def normalize(self, data, currency):
+        """Maps a Skyscanner create/poll response onto Offer records."""
+        results = (data.get("content") or {}).get("results") or {}
+        legs, carriers = results.get("legs", {}), results.get("carriers", {})
+        segments, places = results.get("segments", {}), results.get("places", {})
+
+        def to_leg(leg):
+            carrier = carriers.get((leg.get("marketingCarrierIds") or [""])[0], {})
+            segment = segments.get((leg.get("segmentIds") or [""])[0], {})
+            total_time = int(leg.get("durationInMinutes", 0)) * 60
+            return Leg(
+                airline=carrier.get("name", "Unknown"),
+                flight_num=segment.get("marketingFlightNumber", ""),
+                logo=carrier.get("imageUrl", ""),
+                departure=_sky_datetime(leg.get("departureDateTime")),
+                arrival=_sky_datetime(leg.get("arrivalDateTime")),
+                total_time=total_time,
+                stops=leg.get("stopCount", 0),
+                luggage="",
+                from_city=places.get(leg.get("originPlaceId"), {}).get("name", ""),
+                to_city=places.get(leg.get("destinationPlaceId"), {}).get("name", ""),
+                carrier_code=carrier.get("iata", ""),
+            )
+
+        offers = []
+        for itinerary in (results.get("itineraries") or {}).values():
+            try:
+                options = [option for option in itinerary.get("pricingOptions", []) if option.get("price", {}).get("amount")]
+                if not options:
+                    continue
+                best = min(options, key=lambda option: float(option["price"]["amount"]))
+                itinerary_legs = [to_leg(legs[leg_id]) for leg_id in itinerary["legIds"]]
+                offers.append(Offer(
+                    price=float(best["price"]["amount"]) / 1000,  # amounts are in PRICE_UNIT_MILLI
+                    currency=currency,
+                    outbound=itinerary_legs[0],
+                    inbound=itinerary_legs[1] if len(itinerary_legs) > 1 else None,
+                    booking_url=(best.get("items") or [{}])[0].get("deepLink", ""),
+                    provider=self.name,
+                ))
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue
+        return offers
+
+    async def stream(self, query, deadline=None):
+        """Yields (offers so far, complete) after the create call and after every poll.
+
+        The first snapshot is whatever create returned (often already partial
+        RESULT_STATUS_INCOMPLETE itineraries), so callers can show results
+        before the search completes. Polling stops at the deadline.
+        """
+        give_up_at = time.monotonic() + (deadline or self.deadline)
+        data = await asyncio.to_thread(self.create, query)
+        token = data.get("refreshSessionToken") or data.get("sessionToken")
+        offers = self.normalize(data, query["currency"])
+        complete = data.get("status") != "RESULT_STATUS_INCOMPLETE" or not token
+        yield offers, complete
+
+        interval = self.poll_min_interval
+        while not complete:
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(interval, remaining))
+            data = await asyncio.to_thread(self.poll, token)
+            found = len(offers)
+            offers = self.normalize(data, query["currency"])
+            complete = data.get("status") != "RESULT_STATUS_INCOMPLETE"
+            # ✅ New itineraries arrived: check again soon; otherwise wait longer before the next poll
+            interval = self.poll_min_interval if len(offers) > found else min(interval * self.poll_backoff,
+                                                                               self.poll_max_interval)
+            yield offers, complete
+
+    async def search_async(self, query, deadline=None):
+        offers = []
+        async for offers, _ in self.stream(query, deadline):
+            pass
+        return offers
+
+    def search(self, query):
+        # Runs on a provider pool thread, which has no event loop of its own
+        return asyncio.run(self.search_async(query))
+
+    def iter_search(self, query):
+        loop = asyncio.new_event_loop()
+        snapshots = self.stream(query)
+        try:
+            complete = False
+            while True:
+                try:
+                    offers, complete = loop.run_until_complete(snapshots.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield offers
+            if not complete:
+                raise IncompleteSearch(f"{self.name} polling stopped before the results were complete")
+        finally:
+            loop.run_until_complete(snapshots.aclose())
+            loop.close()
+
+
+def parse_price(text):
+    """'$1,011' -> 1011.0"""
+    digits = re.sub(r"[^\d.]", "", text or "")
+    return float(digits) if digits else None
+
+
+def parse_duration(text):
+    """'1d 5h+' / '5h 17m' -> seconds"""
+    units = {"d": 86400, "h": 3600, "m": 60}
+    return sum(int(amount) * units[unit] for amount, unit in re.findall(r"(\d+)\s*([dhm])", text or ""))
+
+
+class OxylabsProvider(FlightProvider):
+    """Google Flights results scraped through the Oxylabs realtime API."""
+    name = "oxylabs"
+    deadline = float(os.getenv("OXYLABS_DEADLINE", "30"))
+    api_url = "https://realtime.oxylabs.io/v1/queries"
+
+    def search(self, query):
+        text = f"Flights from {query['from_loc']} to {query['to_loc']} on {query['depart_date']:%B %d, %Y}"
+        if query["return_date"]:
+            text += f" returning on {query['return_date']:%B %d, %Y}"
+        response = http_client.post(self.api_url, json={"source": "google_search", "domain": "com",
+                                                        "query": text, "parse": True},
+                                    auth=(os.getenv("OXYLABS_USERNAME", ""), os.getenv("OXYLABS_PASSWORD", "")))
+        response.raise_for_status()
+        return self.normalize(response.json(), query)
+
+    def normalize(self, data, query):
+        try:
+            flights = data["results"][0]["content"]["results"]["flights"]["results"]
+        except (KeyError, IndexError, TypeError):
+            return []
+        offers = []
+        for flight in flights:
+            price = parse_price(flight.get("price"))
+            if price is None:
+                continue
+            total_time = parse_duration(flight.get("duration"))
+            offers.append(Offer(
+                price=price,
+                currency=query["currency"],
+                outbound=Leg(airline=flight.get("airline", "Unknown"), flight_num="", logo="",
+                             departure=None, arrival=None, total_time=total_time,
+                             stops=0 if flight.get("type") == "Nonstop" else 1, luggage="",
+                             from_city=query["from_loc"], to_city=query["to_loc"]),
+                inbound=None,
+                booking_url=flight.get("url", ""),
+                provider=self.name,
+            ))
+        return offers
+
+
+class FakeProvider(FlightProvider):
+    """Offline provider with deterministic prices, for local testing (FLIGHT_PROVIDERS=fake).
+
+    Prices depend on the search and on the current FAKE_PRICE_PERIOD window, so
+    they move between windows the way live fares do. Overrides set with
+    set_price() win, which makes price drops reproducible.
+    """
+    name = "fake"
+    records_history = False  # offline prices stay out of the real price history
+    deadline = 5.0
+    latency = float(os.getenv("FAKE_PROVIDER_LATENCY", "0"))  # seconds per search
+    price_period = int(os.getenv("FAKE_PRICE_PERIOD", "3600"))
+    offers_per_search = 5
+
+    def __init__(self):
+        self.calls = 0
+        self.overrides = {}
+        self._lock = threading.Lock()
+
+    def route_key(self, query):
+        return (query["from_loc"], query["to_loc"], query["depart_date"], query["return_date"])
+
+    def set_price(self, from_loc, to_loc, depart_date, return_date, price):
+        self.overrides[(from_loc, to_loc, depart_date, return_date)] = price
+
+    def search(self, query):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        key = self.route_key(query)
+        window = int(time.time() // self.price_period)
+        rnd = random.Random(f"{key}|{query['currency']}|{query['cabin_class']}|{window}")
+        cheapest = self.overrides.get(key, round(rnd.uniform(150, 1500), 2))
+        departure = datetime.combine(query["depart_date"], datetime.min.time()).replace(hour=rnd.randint(6, 20))
+
+        def leg(origin, destination, when, number):
+            total_time = rnd.randint(2, 16) * 3600
+            return Leg(airline="Fake Air", flight_num=str(number), logo="", departure=when,
+                       arrival=when + timedelta(seconds=total_time), total_time=total_time,
+                       stops=rnd.choice([0, 1]), luggage="1 checked, 1 cabin",
+                       from_city=origin, to_city=destination, carrier_code="FK")
+
+        offers = []
+        for i in range(self.offers_per_search):
+            inbound = None
+            if query["return_date"]:
+                inbound = leg(query["to_loc"], query["from_loc"],
+                              datetime.combine(query["return_date"], departure.time()), 2000 + i)
+            offers.append(Offer(price=round(cheapest * (1 + 0.15 * i), 2), currency=query["currency"],
+                                outbound=leg(query["from_loc"], query["to_loc"], departure, 1000 + i),
+                                inbound=inbound, booking_url="", provider=self.name, token=f"fake-{i}"))
+        return offers
+
+
+PROVIDERS = {provider.name: provider
+             for provider in (BookingProvider(), SkyscannerProvider(), OxylabsProvider(), FakeProvider())}
+
+
+def itinerary_key(offer):
+    """Carrier + flight numbers + times of every leg, or None when too little is known to match."""
+    legs = (offer.outbound, offer.inbound) if offer.inbound else (offer.outbound,)
+    if any(leg.departure is None or not leg.flight_num for leg in legs):
+        return None
+    return tuple((leg.airline, str(leg.flight_num), leg.departure, leg.arrival) for leg in legs)
+
+
+def merge_offers(offer_lists):
+    """Flattens provider results, keeping the cheapest copy of identical itineraries."""
+    best = {}
+    unmatched = []
+    for offers in offer_lists:
+        for offer in offers:
+            key = itinerary_key(offer)
+            if key is None:
+                unmatched.append(offer)
+            elif key not in best or offer.price < best[key].price:
+                best[key] = offer
+    return list(best.values()) + unmatched
+
+
+def iter_providers(query, names=None, status=None):
+    """Queries providers in parallel, yielding the merged offers each time any provider reports more.
+
+    Each provider is dropped once its own deadline passes (its snapshots up to then are kept).
+    Raises the first error when providers failed and none of them produced a snapshot.
+    When a status dict is given, it ends up with each provider's outcome: COMPLETE,
+    PARTIAL (snapshots, then an error or the deadline), FAILED or TIMED_OUT.
+    """
+    status = {} if status is None else status
+    providers = [PROVIDERS[name] for name in (names or ENABLED_PROVIDERS) if name in PROVIDERS]
+    started = time.monotonic()
+    updates = queue.Queue()
+
+    def run(provider):
+        try:
+            for offers in provider.iter_search(query):
+                updates.put((provider, offers, None))
+        except Exception as e:
+            updates.put((provider, None, e))
+        finally:
+            updates.put((provider, None, None))  # done marker
+
+    for provider in providers:
+        _executor.submit(run, provider)
+
+    latest = {}
+    errors = []
+    pending = {provider.name: started + provider.deadline for provider in providers}
+    status.update((name, TIMED_OUT) for name in pending)
+    while pending:
+        try:
+            provider, offers, error = updates.get(timeout=max(min(pending.values()) - time.monotonic(), 0))
+        except queue.Empty:
+            for name, deadline in list(pending.items()):
+                if deadline <= time.monotonic():
+                    print(f"⚠️ {name} missed its {PROVIDERS[name].deadline:g}s deadline; skipping")
+                    status[name] = PARTIAL if name in latest else TIMED_OUT
+                    del pending[name]
+            continue
+        if provider.name not in pending:
+            continue  # late update from a provider that already timed out
+        if error is not None:
+            print(f"⚠️ {provider.name} search failed: {error}")
+            errors.append(error)
+            status[provider.name] = PARTIAL if provider.name in latest else FAILED
+            del pending[provider.name]  # its done marker follows; nothing more to wait for
+        elif offers is not None:
+            latest[provider.name] = offers
+            yield merge_offers(latest.values())
+        else:
+            status[provider.name] = COMPLETE
+            del pending[provider.name]
+            if provider.records_history and latest.get(provider.name):
+                search_writer.submit_prices(query["from_loc"], query["to_loc"], query["depart_date"],
+                                            query["cabin_class"], query["currency"],
+                                            [offer.price for offer in latest[provider.name]])
+    if errors and not latest:
+        raise errors[0]  # ✅ Surface the error only when no provider produced any offers
+
+
+def search_providers(query, names=None, on_progress=None, status=None):
+    """Merged offers from every provider; on_progress(offers) sees each partial merge as it arrives.
+
+    Pass a dict as status to learn which providers completed (see iter_providers).
+    """
+    offers = []
+    for offers in iter_providers(query, names, status):
+        if on_progress:
+            on_progress(offers)
+    return offers
@@ -0,0 +1,71 @@
+"""
+Local ranking of normalized offers.
+
+One upstream fetch can serve every sort order: rank_offers() filters the offers
+(nonstop only, departure window) and keeps the best top_n with a bounded heap,
+so ranking n offers costs O(n log top_n) and never holds more than top_n of them.
+"""
+import heapq
+
+# ✅ Weights used by the "best value" score (in the offer's currency)
+VALUE_PER_HOUR = 25.0
+VALUE_PER_STOP = 50.0
+
+
+def legs(offer):
+    return (offer.outbound, offer.inbound) if offer.inbound else (offer.outbound,)
+
+
+def total_time(offer):
+    """Total time in the air and on layovers across all legs, in seconds."""
+    return sum(leg.total_time for leg in legs(offer))
+
+
+def total_stops(offer):
+    return sum(leg.stops for leg in legs(offer))
+
+
+def departure_minutes(offer):
+    """Minutes after midnight of the outbound departure (end of day if unknown)."""
+    departure = offer.outbound.departure
+    return departure.hour * 60 + departure.minute if departure else 24 * 60
+
+
+def best_value_score(offer):
+    return offer.price + VALUE_PER_HOUR * total_time(offer) / 3600 + VALUE_PER_STOP * total_stops(offer)
+
+
+# Sort keys are composite tuples so ties fall back to price
+SORT_KEYS = {
+    "cheapest": lambda offer: (offer.price,),
+    "fastest": lambda offer: (total_time(offer), offer.price),
+    "fewest_stops": lambda offer: (total_stops(offer), offer.price),
+    "best_value": lambda offer: (best_value_score(offer), offer.price),
+    "earliest_departure": lambda offer: (departure_minutes(offer), offer.price),
+}
+
+SORT_LABELS = {
+    "cheapest": "Cheapest",
+    "fastest": "Fastest",
+    "fewest_stops": "Fewest Stops",
+    "best_value": "Best Value",
+    "earliest_departure": "Earliest Departure",
+}
+
+
+def filter_offers(offers, nonstop_only=False, departure_window=None):
+    """Lazily drops offers with connections or departing outside (start_hour, end_hour)."""
+    for offer in offers:
+        if nonstop_only and total_stops(offer):
+            continue
+        if departure_window:
+            start_hour, end_hour = departure_window
+            if not start_hour * 60 <= departure_minutes(offer) < end_hour * 60:
+                continue
+        yield offer
+
+
+def rank_offers(offers, sort_by="cheapest", top_n=5, nonstop_only=False, departure_window=None):
+    """Returns the top_n offers for a sort key name (or a custom key callable)."""
+    key = SORT_KEYS[sort_by] if isinstance(sort_by, str) else sort_by
+    return heapq.nsmallest(top_n, filter_offers(offers, nonstop_only, departure_window), key=key)
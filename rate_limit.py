@@ -0,0 +1,51 @@
+"""
+Token-bucket rate limiting for upstream APIs.
+
+booking_api.rapidapi_limiter is the process-wide bucket for the RapidAPI plan.
+It is charged once per searchFlights request that actually leaves the process,
+so cache hits are free.
+"""
+import os
+import threading
+import time
+
+RATE_PER_SECOND = float(os.getenv("RAPIDAPI_RATE_PER_SECOND", "5"))
+RATE_BURST = int(os.getenv("RAPIDAPI_RATE_BURST", "5"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a request may be sent."""
+
+    def __init__(self, rate=RATE_PER_SECOND, capacity=RATE_BURST):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"TokenBucket needs rate > 0 and capacity >= 1 (got {rate}, {capacity})")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        if tokens > self.capacity:
+            raise ValueError(f"can't acquire {tokens} tokens from a bucket of {self.capacity}")
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,181 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# ✅ Cache settings (override via environment)
+CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL", "300"))  # 5 minutes
+CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256"))
+CACHE_DB_PATH = os.getenv("SEARCH_CACHE_DB", "")  # e.g. "search_cache.db" to survive restarts
+
+
+def make_cache_key(params):
+    """Builds a stable cache key from the searchFlights query params."""
+    normalized = {}
+    for key, value in params.items():
+        if value is None or value == "":
+            continue  # "returnDate": "" and a missing returnDate are the same search
+        if isinstance(value, str):
+            value = value.strip().upper()
+        normalized[key] = str(value)
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+class TTLCache:
+    """Thread-safe in-memory cache with per-entry TTL and LRU eviction."""
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)  # ✅ Mark as most recently used
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)  # ✅ Evict least recently used
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """Persistent second-tier cache stored in a small SQLite file (ttl=0: never expires, as in TTLCache)."""
+
+    def __init__(self, path, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES * 8):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                " cache_key TEXT PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_search_cache_last_used ON search_cache (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:  # commits, or rolls back on error
+                yield conn
+        finally:
+            conn.close()  # ✅ sqlite3's own context manager doesn't close the connection
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, expires_at FROM search_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM search_cache WHERE cache_key = ?", (key,))
+                return None
+            conn.execute("UPDATE search_cache SET last_used = ? WHERE cache_key = ?", (now, key))
+            return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (cache_key, payload, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl else math.inf, now),
+            )
+            # ✅ Keep the file bounded: drop expired rows, then the least recently used overflow
+            conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM search_cache WHERE cache_key IN ("
+                " SELECT cache_key FROM search_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM search_cache WHERE cache_key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM search_cache")
+
+
+class SearchCache:
+    """Two-tier cache for searchFlights responses: memory first, then optional SQLite."""
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, db_path=CACHE_DB_PATH):
+        self.memory = TTLCache(ttl=ttl, max_entries=max_entries)
+        self.disk = SQLiteCache(db_path, ttl=ttl) if db_path else None
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, params):
+        key = make_cache_key(params)
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)  # ✅ Promote disk hit into memory
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, params, value):
+        key = make_cache_key(params)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def get_or_fetch(self, params, fetch):
+        """Returns the cached response for params, calling fetch(params) on a miss."""
+        value = self.get(params)
+        if value is None:
+            value = fetch(params)
+            self.set(params, value)
+        return value
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+# ✅ Process-wide cache shared by every Streamlit session
+search_cache = SearchCache()
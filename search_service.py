@@ -0,0 +1,275 @@
+"""
+Flight search backend: fetch + normalize + rank (+ background persistence).
+
+run_search() is the whole search pipeline (providers in providers.py). The Flask blueprint exposes it as
+POST /search on the API server (registered in auth.py), where searches run on
+a bounded worker pool instead of the UI's script thread, so search capacity
+scales with API workers rather than Streamlit sessions. search_offers() is
+the thin client the Streamlit page calls. It goes over HTTP when a service URL
+is configured and runs in-process otherwise. Over HTTP the signed-in user is sent
+as a signed user_token; the API ignores any user_id in the request body.
+"""
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import date, datetime
+
+from flask import Blueprint, current_app, jsonify, request, session
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+import http_client
+from booking_api import search_params
+from offer_normalizer import Leg, Offer
+from providers import search_providers
+from ranking import SORT_KEYS, rank_offers
+from search_cache import TTLCache, make_cache_key
+from single_flight import SingleFlight, file_lock
+from write_behind import search_writer
+
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "32"))
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "45"))  # seconds a POST /search waits
+SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key")  # same key as the API's Flask sessions
+USER_TOKEN_MAX_AGE = int(os.getenv("SEARCH_USER_TOKEN_MAX_AGE", "3600"))  # seconds
+CABIN_CLASSES = ("ECONOMY", "PREMIUM_ECONOMY", "BUSINESS", "FIRST")
+
+_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+_jobs = TTLCache(ttl=300, max_entries=1000)  # job_id -> Future, for clients that poll
+_in_flight = SingleFlight()  # identical concurrent searches share one upstream call
+
+
+def _parse_date(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def _parse_bool(value):
+    if not isinstance(value, bool):  # ✅ bool("false") would be True
+        raise ValueError(f"expected true or false, got {value!r}")
+    return value
+
+
+def _parse_window(value):
+    """(start_hour, end_hour) with 0 <= start < end <= 24, or None for any time."""
+    if not value:
+        return None
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError(f"departure_window must be [start_hour, end_hour], got {value!r}")
+    start, end = value
+    if any(isinstance(hour, bool) or not isinstance(hour, (int, float)) for hour in value) \
+            or not 0 <= start < end <= 24:
+        raise ValueError(f"departure_window must be hours with 0 <= start < end <= 24, got {value!r}")
+    return start, end
+
+
+def parse_search_request(data):
+    """Validates a search request body; raises ValueError on bad input."""
+    try:
+        query = {
+            "from_loc": data["from"].strip().upper(),
+            "to_loc": data["to"].strip().upper(),
+            "depart_date": _parse_date(data["depart_date"]),
+            "return_date": _parse_date(data.get("return_date")),
+            "currency": data.get("currency", "USD").upper(),
+            "adults": int(data.get("adults", 1)),
+            "children": int(data.get("children", 0)),
+            "cabin_class": data.get("cabin_class", "ECONOMY").upper(),
+            "sort_by": data.get("sort_by", "cheapest"),
+            "top_n": int(data.get("top_n", 5)),
+            "nonstop_only": _parse_bool(data.get("nonstop_only", False)),
+            "departure_window": _parse_window(data.get("departure_window")),
+        }
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"missing or invalid field: {e}")
+    if query["sort_by"] not in SORT_KEYS:
+        raise ValueError(f"unknown sort_by: {query['sort_by']}")
+    if query["cabin_class"] not in CABIN_CLASSES:
+        raise ValueError(f"unknown cabin_class: {query['cabin_class']}")
+    if len(query["currency"]) != 3 or not query["currency"].isalpha():
+        raise ValueError(f"currency must be a 3-letter code, got {query['currency']!r}")
+    if query["adults"] < 1 or query["children"] < 0 or query["top_n"] < 1:
+        raise ValueError("adults and top_n must be at least 1, children at least 0")
+    return query
+
+
+def query_to_json(query):
+    return {
+        "from": query["from_loc"],
+        "to": query["to_loc"],
+        "depart_date": query["depart_date"].isoformat(),
+        "return_date": query["return_date"].isoformat() if query["return_date"] else None,
+        "currency": query["currency"],
+        "adults": query["adults"],
+        "children": query["children"],
+        "cabin_class": query["cabin_class"],
+        "sort_by": query["sort_by"],
+        "top_n": query["top_n"],
+        "nonstop_only": query["nonstop_only"],
+        "departure_window": list(query["departure_window"]) if query["departure_window"] else None,
+    }
+
+
+def _user_serializer(secret_key):
+    return URLSafeTimedSerializer(secret_key, salt="search-user")
+
+
+def user_token(user_id, secret_key=SECRET_KEY):
+    """Signed user_id the Streamlit client sends with a search, so the API can trust it."""
+    return _user_serializer(secret_key).dumps(user_id)
+
+
+def verified_user_id(token, secret_key=SECRET_KEY, max_age=USER_TOKEN_MAX_AGE):
+    """user_id from a user_token(), or None when it is missing, forged or expired."""
+    if not token:
+        return None
+    try:
+        return _user_serializer(secret_key).loads(token, max_age=max_age)
+    except BadSignature:
+        return None
+
+
+def offer_to_dict(offer):
+    data = asdict(offer)
+    for leg in (data["outbound"], data["inbound"]):
+        if leg:
+            for field in ("departure", "arrival"):
+                leg[field] = leg[field].isoformat() if leg[field] else None
+    return data
+
+
+def _leg_from_dict(data):
+    if not data:
+        return None
+    data = dict(data)
+    for field in ("departure", "arrival"):
+        data[field] = datetime.fromisoformat(data[field]) if data[field] else None
+    return Leg(**data)
+
+
+def offer_from_dict(data):
+    data = dict(data)
+    data["outbound"] = _leg_from_dict(data["outbound"])
+    data["inbound"] = _leg_from_dict(data["inbound"])
+    return Offer(**data)
+
+
+def fetch_offers_once(query, on_progress=None):
+    """Merged offers from every enabled provider; concurrent identical requests share one fetch.
+
+    Returns (offers, shared). The offer list is shared between callers, so treat it as read-only.
+    on_progress(offers) sees partial merges, but only in the caller that runs the fetch.
+    """
+    key = make_cache_key(search_params(query["from_loc"], query["to_loc"], query["depart_date"],
+                                       query["return_date"], query["currency"], query["adults"],
+                                       query["children"], query["cabin_class"]))
+
+    def fetch():
+        with file_lock(key):
+            return search_providers(query, on_progress=on_progress)
+
+    return _in_flight.do(key, fetch)
+
+
+def _rank(query, offers):
+    return rank_offers(offers, sort_by=query["sort_by"], top_n=query["top_n"],
+                       nonstop_only=query["nonstop_only"], departure_window=query["departure_window"])
+
+
+def run_search(query, user_id=None, on_progress=None):
+    """Fetches, normalizes and ranks one search; returns (top offers, total offers).
+
+    on_progress(top offers, offers so far) is called with the partial ranking each
+    time a provider reports more offers, before the search completes.
+    """
+    progress = (lambda offers: on_progress(_rank(query, offers), len(offers))) if on_progress else None
+    all_offers, _ = fetch_offers_once(query, progress)
+    ranked = _rank(query, all_offers)
+
+    # Save the search and its offers in the background (no DB write on this path). Price
+    # history isn't recorded here: the provider layer records it once per upstream response.
+    search_writer.submit({
+        "user_id": user_id,
+        "origin": query["from_loc"],
+        "destination": query["to_loc"],
+        "departure_date": query["depart_date"],
+        "return_date": query["return_date"],
+        "trip_type": "Round-trip" if query["return_date"] else "One-way",
+        "cabin_class": query["cabin_class"],
+        "currency": query["currency"],
+        "adults": query["adults"],
+        "children": query["children"],
+        "created_at": datetime.now()
+    }, all_offers)  # ✅ Every saved search gets its own results, coalesced or not
+    return ranked, len(all_offers)
+
+
+def search_offers(query, user_id=None, service_url=None, on_progress=None):
+    """Runs a search through the search service at service_url, or in-process without one.
+
+    Partial results (on_progress) are only reported for in-process searches.
+    """
+    if not service_url:
+        return run_search(query, user_id, on_progress)
+    body = query_to_json(query)
+    if user_id is not None:
+        body["user_token"] = user_token(user_id)
+    response = http_client.post(f"{service_url}/search", json=body, timeout=(3.05, SEARCH_TIMEOUT + 5))
+    deadline = time.monotonic() + SEARCH_TIMEOUT
+    while response.status_code == 202 and time.monotonic() < deadline:
+        time.sleep(0.5)
+        response = http_client.get(f"{service_url}/search/{response.json()['job_id']}")
+    if response.status_code == 202:
+        raise TimeoutError("search is still running on the search service")
+    response.raise_for_status()
+    payload = response.json()
+    return [offer_from_dict(offer) for offer in payload["offers"]], payload["total"]
+
+
+def _job_response(job_id, future):
+    if not future.done():
+        return jsonify({"job_id": job_id, "status": "pending"}), 202
+    try:
+        offers, total = future.result()
+    except Exception as e:
+        return jsonify({"job_id": job_id, "status": "failed", "error": str(e)}), 502
+    return jsonify({"job_id": job_id, "status": "done", "total": total,
+                    "offers": [offer_to_dict(offer) for offer in offers]}), 200
+
+
+search_bp = Blueprint("search", __name__)
+
+
+# 🚀 Search Endpoint
+@search_bp.route("/search", methods=["POST"])
+def search():
+    data = request.get_json(silent=True) or {}
+    try:
+        query = parse_search_request(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # ✅ Only the login session or a signed token attributes a search; anything else is anonymous
+    user_id = session.get("user_id") or verified_user_id(data.get("user_token"), current_app.secret_key)
+    job_id = uuid.uuid4().hex
+    future = _executor.submit(run_search, query, user_id)
+    _jobs.set(job_id, future)
+
+    # Clients that pass "wait": false get a job_id right away and poll GET /search/<job_id>
+    if data.get("wait", True):
+        try:
+            future.result(timeout=SEARCH_TIMEOUT)
+        except Exception:
+            pass  # still running (202) or failed (502); reported by _job_response
+    return _job_response(job_id, future)
+
+
+@search_bp.route("/search/<job_id>", methods=["GET"])
+def search_status(job_id):
+    future = _jobs.get(job_id)
+    if future is None:
+        return jsonify({"error": "Unknown or expired search"}), 404
+    return _job_response(job_id, future)
@@ -0,0 +1,86 @@
+"""
+Request coalescing ("single flight") for identical in-flight searches.
+
+SingleFlight.do(key, fn) runs fn once per key at a time: threads that arrive
+while a call for the same key is running wait for it and share its result (or
+its exception). file_lock(key) extends this across processes with an flock on a
+per-key lock file. The first process fetches, and the others block on the lock,
+then find the response in the shared SQLite cache tier (SEARCH_CACHE_DB).
+"""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process coalescing is unavailable
+    fcntl = None
+
+LOCK_DIR = os.getenv("SINGLE_FLIGHT_LOCK_DIR", "")  # e.g. "/tmp/airsavvy-locks" to enable
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    def do(self, key, fn):
+        """Returns (result, shared); shared is True when another caller's run was reused."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["calls"] += 1
+            else:
+                call.waiters += 1
+                self.stats["shared"] += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+@contextmanager
+def file_lock(key, lock_dir=LOCK_DIR):
+    """Holds an exclusive cross-process lock for key (a no-op when LOCK_DIR is unset)."""
+    if not lock_dir or fcntl is None:
+        yield
+        return
+    os.makedirs(lock_dir, exist_ok=True)
+    path = os.path.join(lock_dir, hashlib.sha1(key.encode()).hexdigest() + ".lock")
+    with open(path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
@@ -0,0 +1,84 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import providers
+from alert_worker import (AVAILABILITY_CHANGE, PRICE_DROP, evaluate_alerts, fetch_routes, load_active_alerts,
+                          route_query)
+from create_db import Alert, FlightResult, FlightSearch, User, init_db, make_engine
+
+DEPARTURE = date.today() + timedelta(days=30)
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    provider = providers.PROVIDERS["fake"]
+    monkeypatch.setattr(provider, "overrides", {})
+    monkeypatch.setattr(provider, "calls", 0)
+    return provider
+
+
+@pytest.fixture
+def Session(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'alerts.db'}")
+    init_db(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.add(User(user_id=1, email="a@example.com", password_hash="x", full_name="A", currency="USD"))
+        for search_id, alert_type in ((1, PRICE_DROP), (2, AVAILABILITY_CHANGE)):
+            session.add(FlightSearch(search_id=search_id, user_id=1, origin="YYZ", destination="YVR",
+                                     departure_date=datetime.combine(DEPARTURE, datetime.min.time()),
+                                     trip_type="One-way", cabin_class="ECONOMY"))
+            session.add(Alert(user_id=1, search_id=search_id, alert_type=alert_type))
+            session.add(FlightResult(search_id=search_id, airline="Fake Air", price=500.0, duration="5h 00m",
+                                     retrieved_at=datetime.now() - timedelta(days=1)))
+        session.commit()
+    return Session
+
+
+def triggered(Session):
+    with Session() as session:
+        return {alert.alert_type: (alert.alert_triggered, alert.price_change) for alert in session.query(Alert)}
+
+
+def test_price_drop_triggers_once_per_route(Session, fake):
+    fake.set_price("YYZ", "YVR", DEPARTURE, None, 400.0)
+    stats = evaluate_alerts(Session, ["fake"])
+
+    assert fake.calls == 1  # two alerts, one route, one upstream search
+    assert (stats["fetched"], stats["triggered"]) == (1, 1)
+    assert triggered(Session) == {PRICE_DROP: (True, -100.0), AVAILABILITY_CHANGE: (False, None)}
+
+
+def test_no_trigger_when_price_did_not_drop(Session, fake):
+    fake.set_price("YYZ", "YVR", DEPARTURE, None, 600.0)
+    assert evaluate_alerts(Session, ["fake"])["triggered"] == 0
+
+
+def test_timed_out_provider_is_a_failed_check_not_sold_out(Session, fake, monkeypatch):
+    monkeypatch.setattr(fake, "deadline", 0.1)
+    monkeypatch.setattr(fake, "latency", 0.5)
+    with Session() as session:
+        groups = load_active_alerts(session)
+    assert fetch_routes(list(groups), ["fake"]) == {}
+
+    stats = evaluate_alerts(Session, ["fake"], groups=groups)
+    assert (stats["fetched"], stats["failed"], stats["triggered"]) == (0, 1, 0)
+    with Session() as session:
+        assert session.query(FlightResult).count() == 2  # nothing saved as the last known price
+
+
+def test_rechecks_use_the_searchs_passengers_and_currency(Session):
+    with Session() as session:
+        session.add(FlightSearch(search_id=3, user_id=1, origin="YYZ", destination="YVR",
+                                 departure_date=datetime.combine(DEPARTURE, datetime.min.time()), trip_type="One-way",
+                                 cabin_class="ECONOMY", currency="CAD", adults=2, children=1))
+        session.add(Alert(user_id=1, search_id=3, alert_type=PRICE_DROP))
+        session.commit()
+        groups = load_active_alerts(session)
+
+    keys = {(key.adults, key.children, key.currency): group["search_ids"] for key, group in groups.items()}
+    assert keys == {(1, 0, "USD"): {1, 2}, (2, 1, "CAD"): {3}}
+    query = route_query(next(key for key in groups if key.currency == "CAD"))
+    assert (query["adults"], query["children"], query["currency"]) == (2, 1, "CAD")
@@ -0,0 +1,42 @@
+from datetime import date
+
+import pytest
+
+import booking_api
+from booking_api import fetch_flights, search_params
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def raw_offer(units):
+    return {"priceBreakdown": {"total": {"units": units, "nanos": 500_000_000}}, "segments": []}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls, recorded = [], []
+    data = {"data": {"flightOffers": [raw_offer(120), raw_offer(95), {"broken": True}]}}
+    monkeypatch.setattr(booking_api.http_client, "get", lambda *args, **kwargs: calls.append(kwargs) or Response(data))
+    monkeypatch.setattr(booking_api.search_writer, "submit_prices", lambda *args: recorded.append(args))
+    booking_api.search_cache.clear()
+    yield calls, recorded
+    booking_api.search_cache.clear()
+
+
+def test_prices_recorded_once_per_upstream_response(upstream):
+    calls, recorded = upstream
+    params = search_params("YYZ", "YVR", date(2025, 3, 5), None, "CAD", 2, 0, "BUSINESS")
+    for _ in range(3):
+        fetch_flights(params, {})
+
+    assert len(calls) == 1
+    assert recorded == [("YYZ", "YVR", date(2025, 3, 5), "BUSINESS", "CAD", [120.5, 95.5])]
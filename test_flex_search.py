@@ -0,0 +1,26 @@
+from datetime import date, timedelta
+
+import pytest
+
+from flex_search import date_window, flexible_search
+
+TODAY = date.today()
+
+
+def test_date_window_skips_past_dates():
+    assert date_window(TODAY + timedelta(days=1), 3) == [TODAY + timedelta(days=offset) for offset in range(5)]
+
+
+def test_failed_dates_are_reported_and_retried():
+    def fetch_price(depart, ret):
+        if depart == TODAY:
+            raise RuntimeError("upstream down")
+        return 100.0
+
+    errors = []
+    known = flexible_search(fetch_price, date_window(TODAY, 1), errors=errors)
+    assert known == {(TODAY + timedelta(days=1), None): 100.0}
+    assert [(pair, str(error)) for pair, error in errors] == [((TODAY, None), "upstream down")]
+
+    with pytest.raises(RuntimeError, match="upstream down"):
+        flexible_search(fetch_price, [TODAY], known=known)
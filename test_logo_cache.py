@@ -0,0 +1,27 @@
+import pytest
+
+import logo_cache
+from logo_cache import LogoCache
+
+
+@pytest.fixture
+def failing_download(monkeypatch):
+    calls = []
+
+    def get(url):
+        calls.append(url)
+        raise ConnectionError("logo host down")
+
+    monkeypatch.setattr(logo_cache.http_client, "get", get)
+    return calls
+
+
+def test_failed_logo_is_not_retried_until_its_ttl_expires(tmp_path, failing_download, monkeypatch):
+    cache = LogoCache(cache_dir=str(tmp_path), failure_ttl=60)
+    assert cache.get("AC", "https://example.com/ac.png") is None
+    assert cache.get("AC", "https://example.com/ac.png") is None
+    assert (len(failing_download), cache.stats["failure_hits"]) == (1, 1)
+
+    monkeypatch.setattr("search_cache.time.time", lambda: 10 ** 12)  # well past the failure TTL
+    assert cache.get("AC", "https://example.com/ac.png") is None
+    assert len(failing_download) == 2
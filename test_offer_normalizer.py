@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from offer_normalizer import parse_datetime
+
+
+def test_parse_datetime_accepts_api_timestamps():
+    assert parse_datetime("2025-03-05T13:45:00") == datetime(2025, 3, 5, 13, 45)
+
+
+def test_parse_datetime_rejects_offsets_and_dates():
+    assert parse_datetime("2025-03-05T13:45:00+02:00") is None
+    assert parse_datetime("2025-03-05T13:45:00Z") is None
+    assert parse_datetime("2025-03-05") is None
+    assert parse_datetime("") is None
+    assert parse_datetime(None) is None
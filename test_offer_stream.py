@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from offer_stream import iter_stream_offers
+
+OFFERS = [
+    {"token": "a", "segments": [{"airline": "Air Canadá", "note": "brace } and \"quote\" [ inside"}]},
+    {"token": "b\\", "priceBreakdown": {"total": {"units": 95}}},
+]
+BODY = json.dumps({"status": True, "data": {"aggregation": {"flightOffers": 3},
+                                            "flightOffers": OFFERS}}, ensure_ascii=False).encode()
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(BODY)])
+def test_offers_survive_any_chunk_boundary(size):
+    assert list(iter_stream_offers(chunked(BODY, size))) == OFFERS
+
+
+def test_truncated_body_raises():
+    with pytest.raises(ValueError, match="ended before"):
+        list(iter_stream_offers(chunked(BODY[:-20], 5)))
+
+
+def test_oversized_offer_raises():
+    with pytest.raises(ValueError, match="exceeds"):
+        list(iter_stream_offers(chunked(BODY, 16), max_offer_bytes=32))
@@ -0,0 +1,29 @@
+import hashlib
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+
+from passwords import hash_password, needs_rehash, verify
+
+CHEAP = "pbkdf2:sha256:1000"  # keeps the tests fast
+
+
+def test_legacy_sha256_hash_verifies_and_asks_for_a_rehash():
+    legacy = hashlib.sha256(b"hunter2").hexdigest()
+    assert verify(legacy, "hunter2") == (True, True)
+    assert verify(legacy, "wrong")[0] is False
+
+
+def test_needs_rehash_fills_in_werkzeug_defaults():
+    assert not needs_rehash("scrypt$salt$hash", "scrypt:32768:8:1")
+    assert not needs_rehash(f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}$salt$hash", "pbkdf2:sha256")
+    assert needs_rehash("pbkdf2:sha256:1000$salt$hash", "pbkdf2:sha256:2000")
+    assert needs_rehash("scrypt:16384:8:1$salt$hash", "scrypt:32768:8:1")
+    assert needs_rehash("scrypt:abc$salt$hash", "scrypt")  # malformed parameters
+
+
+def test_verify_reports_rehash_only_for_a_matching_password():
+    stored = hash_password("hunter2", method=CHEAP)
+    assert verify(stored, "hunter2", method=CHEAP) == (True, False)
+    assert verify(stored, "hunter2", method="pbkdf2:sha256:2000") == (True, True)
+    assert verify(stored, "wrong", method="pbkdf2:sha256:2000") == (False, False)
+    assert verify("not a hash", "hunter2") == (False, False)
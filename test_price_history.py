@@ -0,0 +1,37 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from create_db import PriceHistory, init_db, make_engine
+from price_history import record_prices
+
+OBSERVED_AT = datetime(2025, 3, 1, 10, 15)
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    init_db(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+
+def record(session, prices):
+    bucket = record_prices(session, "YYZ", "YVR", date(2025, 3, 5), "ECONOMY", "USD", prices, OBSERVED_AT)
+    session.commit()
+    return bucket
+
+
+def test_one_cheap_search_does_not_outweigh_the_hour(session):
+    for search in range(10):
+        record(session, [499.0 + (search + i) % 3 for i in range(100)])
+    bucket = record(session, [100.0] * 100)
+
+    assert session.query(PriceHistory).count() == 1
+    assert (bucket.sample_count, bucket.min_price, bucket.max_price) == (1100, 100.0, 501.0)
+    assert 499.0 <= bucket.median_price <= 501.0
+
+
+def test_median_of_a_small_even_search(session):
+    assert record(session, [300.0, 100.0, 200.0, 400.0]).median_price == 250.0
@@ -0,0 +1,33 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from profile_cache import ProfileCache
+
+
+def make_user(currency, updated_at):
+    return SimpleNamespace(user_id=1, email="a@example.com", full_name="A", flight_type=None, currency=currency,
+                           market="US", updated_at=updated_at)
+
+
+OLD = make_user("USD", datetime(2025, 3, 1, 10, 0))
+NEW = make_user("CAD", datetime(2025, 3, 1, 10, 5))
+
+
+def test_miss_that_raced_a_put_keeps_the_newer_record():
+    cache = ProfileCache()
+
+    def load():
+        cache.set(NEW)  # the PUT commits and writes through while this GET still holds the old row
+        return OLD
+
+    assert cache.get(1, load=load)["currency"] == "CAD"
+    assert cache.get(email="a@example.com")["currency"] == "CAD"
+    assert cache.snapshot()["stale_loads"] == 1
+
+
+def test_newer_record_replaces_an_older_one():
+    cache = ProfileCache()
+    cache.set(OLD)
+    cache.set(NEW)
+    assert cache.get(1)["currency"] == "CAD"
+    assert cache.snapshot()["stale_loads"] == 0
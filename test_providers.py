@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+
+import providers
+from offer_normalizer import Leg, Offer
+from providers import FlightProvider, merge_offers, search_providers
+
+
+def make_offer(price, flight_num="AC1", provider="booking", departure=datetime(2025, 3, 5, 8)):
+    leg = Leg("Air Canada", flight_num, "", departure, datetime(2025, 3, 5, 11), 10800, 0,
+              "1 checked, 1 cabin", "Toronto", "Vancouver", "AC")
+    return Offer(price, "USD", leg, None, "", provider=provider)
+
+
+QUERY = {"from_loc": "YYZ", "to_loc": "YVR", "depart_date": datetime(2025, 3, 5).date(), "return_date": None,
+         "currency": "USD", "adults": 1, "children": 0, "cabin_class": "ECONOMY"}
+
+
+class PartialThenFails(FlightProvider):
+    name = "partial"
+    deadline = 5.0
+
+    def iter_search(self, query):
+        yield [make_offer(300.0)]
+        raise RuntimeError("poll failed")
+
+
+class Fails(FlightProvider):
+    name = "fails"
+    deadline = 5.0
+
+    def iter_search(self, query):
+        raise RuntimeError("create failed")
+        yield
+
+
+@pytest.fixture
+def test_providers(monkeypatch):
+    monkeypatch.setitem(providers.PROVIDERS, "partial", PartialThenFails())
+    monkeypatch.setitem(providers.PROVIDERS, "fails", Fails())
+
+
+def test_merge_offers_keeps_cheapest_copy_of_each_itinerary():
+    booking = [make_offer(320.0), make_offer(410.0, flight_num="AC2")]
+    skyscanner = [make_offer(299.0, provider="skyscanner")]
+    merged = merge_offers([booking, skyscanner])
+    assert sorted((offer.price, offer.provider) for offer in merged) == [(299.0, "skyscanner"), (410.0, "booking")]
+
+
+def test_merge_offers_keeps_offers_that_cannot_be_matched():
+    unknown = make_offer(250.0, flight_num="")
+    merged = merge_offers([[unknown], [make_offer(251.0, flight_num="")]])
+    assert len(merged) == 2
+
+
+def test_partial_snapshots_survive_a_later_failure(test_providers):
+    offers = search_providers(QUERY, ["partial", "fails"])
+    assert [offer.price for offer in offers] == [300.0]
+
+
+def test_error_raised_when_no_provider_produced_offers(test_providers):
+    with pytest.raises(RuntimeError, match="create failed"):
+        search_providers(QUERY, ["fails"])
+
+
+def test_skyscanner_cut_off_by_its_deadline_reports_partial(monkeypatch):
+    skyscanner = providers.PROVIDERS["skyscanner"]
+    incomplete = {"status": "RESULT_STATUS_INCOMPLETE", "sessionToken": "t"}
+    monkeypatch.setattr(skyscanner, "create", lambda query: incomplete)
+    monkeypatch.setattr(skyscanner, "poll", lambda token: incomplete)
+    monkeypatch.setattr(skyscanner, "normalize", lambda data, currency: [make_offer(300.0, provider="skyscanner")])
+    monkeypatch.setattr(skyscanner, "poll_min_interval", 0.01)
+    monkeypatch.setattr(skyscanner, "deadline", 0.2)
+
+    status = {}
+    offers = search_providers(QUERY, ["skyscanner"], status=status)
+    assert [offer.price for offer in offers] == [300.0]
+    assert status == {"skyscanner": providers.PARTIAL}
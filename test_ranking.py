@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from offer_normalizer import Leg, Offer
+from ranking import rank_offers
+
+
+def make_offer(price, hour, stops=0, hours=3, departure=True):
+    depart = datetime(2025, 3, 5, hour) if departure else None
+    leg = Leg("Air Canada", f"AC{price:.0f}", "", depart, None, hours * 3600, stops, "", "Toronto", "Vancouver", "AC")
+    return Offer(price, "USD", leg, None, "")
+
+
+OFFERS = [make_offer(300.0, 6, hours=2), make_offer(200.0, 9, stops=1, hours=8), make_offer(250.0, 18),
+          make_offer(150.0, 23, stops=2, hours=12), make_offer(100.0, 0, departure=False)]
+
+
+def prices(offers):
+    return [offer.price for offer in offers]
+
+
+def test_nonstop_only_drops_connections():
+    assert prices(rank_offers(OFFERS, nonstop_only=True)) == [100.0, 250.0, 300.0]
+
+
+def test_departure_window_is_start_inclusive_end_exclusive():
+    assert prices(rank_offers(OFFERS, departure_window=(6, 18))) == [200.0, 300.0]
+
+
+def test_unknown_departure_is_outside_any_window():
+    assert 100.0 not in prices(rank_offers(OFFERS, departure_window=(0, 24)))
+
+
+def test_filters_combine_with_sort_and_top_n():
+    assert prices(rank_offers(OFFERS, sort_by="fastest", top_n=2, nonstop_only=True)) == [300.0, 100.0]
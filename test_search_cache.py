@@ -0,0 +1,20 @@
+from search_cache import SearchCache, SQLiteCache, TTLCache
+
+PARAMS = {"fromId": "YYZ.AIRPORT", "toId": "YVR.AIRPORT", "departDate": "2025-03-05"}
+
+
+def test_ttl_zero_never_expires_in_either_tier(tmp_path, monkeypatch):
+    memory, disk = TTLCache(ttl=0), SQLiteCache(str(tmp_path / "cache.db"), ttl=0)
+    for cache in (memory, disk):
+        cache.set("key", {"data": 1})
+    monkeypatch.setattr("search_cache.time.time", lambda: 10 ** 12)
+    assert memory.get("key") == disk.get("key") == {"data": 1}
+
+
+def test_disk_tier_survives_a_new_process(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    SearchCache(db_path=db_path).set(PARAMS, {"data": 1})
+
+    cache = SearchCache(db_path=db_path)
+    assert cache.get_or_fetch(PARAMS, lambda params: {"data": 2}) == {"data": 1}
+    assert (cache.hits, cache.misses) == (1, 0)
@@ -0,0 +1,55 @@
+from datetime import date, datetime
+
+import pytest
+
+import search_service
+from offer_normalizer import Leg, Offer
+from search_service import parse_search_request, run_search
+
+QUERY = {"from_loc": "YYZ", "to_loc": "YVR", "depart_date": date(2025, 3, 5), "return_date": None,
+         "currency": "USD", "adults": 1, "children": 0, "cabin_class": "ECONOMY", "sort_by": "cheapest",
+         "top_n": 5, "nonstop_only": False, "departure_window": None}
+
+
+def make_offer(price):
+    leg = Leg("Air Canada", "AC1", "", datetime(2025, 3, 5, 8), datetime(2025, 3, 5, 11), 10800, 0,
+              "1 checked, 1 cabin", "Toronto", "Vancouver", "AC")
+    return Offer(price, "USD", leg, None, "")
+
+
+def test_coalesced_search_still_saves_its_results(monkeypatch):
+    offers = [make_offer(120.0), make_offer(95.0)]
+    submitted = []
+    monkeypatch.setattr(search_service, "fetch_offers_once", lambda query, progress: (offers, True))
+    monkeypatch.setattr(search_service.search_writer, "submit",
+                        lambda fields, offers=(), cabin_class=None: submitted.append((fields, offers, cabin_class)))
+
+    ranked, total = run_search(QUERY, user_id=7)
+
+    assert ([offer.price for offer in ranked], total) == ([95.0, 120.0], 2)
+    fields, saved, cabin_class = submitted[0]
+    assert (fields["user_id"], saved, cabin_class) == (7, offers, None)  # history is recorded upstream
+
+
+BODY = {"from": "yyz", "to": "yvr", "depart_date": "2025-03-05"}
+
+
+@pytest.mark.parametrize("field, value", [
+    ("nonstop_only", "false"),
+    ("departure_window", ["a", "b"]),
+    ("departure_window", [18, 6]),
+    ("departure_window", [6]),
+    ("cabin_class", "COACH"),
+    ("currency", "DOLLARS"),
+    ("currency", 5),
+])
+def test_bad_request_fields_are_rejected(field, value):
+    with pytest.raises(ValueError):
+        parse_search_request({**BODY, field: value})
+
+
+def test_valid_request_is_normalized():
+    query = parse_search_request({**BODY, "nonstop_only": True, "departure_window": [6, 12], "currency": "cad",
+                                  "cabin_class": "business"})
+    assert (query["from_loc"], query["nonstop_only"], query["departure_window"]) == ("YYZ", True, (6, 12))
+    assert (query["currency"], query["cabin_class"]) == ("CAD", "BUSINESS")
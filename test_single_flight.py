@@ -0,0 +1,49 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from single_flight import SingleFlight
+
+
+def run_concurrently(flight, fn, callers=5):
+    """Starts `callers` threads on one key and releases the leader once the rest are waiting."""
+    started, release = threading.Event(), threading.Event()
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call(_):
+        try:
+            return flight.do("key", leader_fn)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        futures = [pool.submit(call, None)]
+        started.wait(5)
+        futures += [pool.submit(call, None) for _ in range(callers - 1)]
+        while flight.stats["shared"] < callers - 1:
+            time.sleep(0.001)
+        release.set()
+        return [future.result() for future in futures]
+
+
+def test_waiters_share_the_leaders_result():
+    flight = SingleFlight()
+    results = run_concurrently(flight, lambda: "offers")
+    assert results == [("offers", False)] + [("offers", True)] * 4
+    assert (flight.stats["calls"], flight.in_flight()) == (1, 0)
+
+
+def test_waiters_share_the_leaders_error_and_the_next_call_retries():
+    flight = SingleFlight()
+    error = RuntimeError("upstream down")
+
+    def fail():
+        raise error
+
+    assert all(result is error for result in run_concurrently(flight, fail))
+    assert flight.stats["calls"] == 1
+    assert flight.do("key", lambda: "offers") == ("offers", False)  # failures aren't cached
@@ -0,0 +1,74 @@
+from datetime import date, datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from create_db import FlightResult, FlightSearch, PriceHistory, init_db, make_engine
+from offer_normalizer import Leg, Offer
+from write_behind import WriteBehindWriter
+
+
+def make_offer(price):
+    leg = Leg("Air Canada", "AC1", "", datetime(2025, 3, 5, 8), datetime(2025, 3, 5, 11), 10800, 0,
+              "1 checked, 1 cabin", "Toronto", "Vancouver", "AC")
+    return Offer(price, "USD", leg, None, "https://flights.booking.com/flights/YYZ-YVR/")
+
+
+def search_fields(user_id):
+    return {
+        "user_id": user_id,
+        "origin": "YYZ",
+        "destination": "YVR",
+        "departure_date": date(2025, 3, 5),
+        "return_date": None,
+        "trip_type": "One-way",
+        "created_at": datetime.now(),
+    }
+
+
+def make_writer(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'write_behind.db'}")
+    init_db(engine)
+    return WriteBehindWriter(sessionmaker(bind=engine), flush_interval=60), sessionmaker(bind=engine)
+
+
+def test_anonymous_search_records_price_history(tmp_path):
+    writer, Session = make_writer(tmp_path)
+    assert writer.submit(search_fields(None), [make_offer(120.0), make_offer(95.0)], cabin_class="ECONOMY")
+    writer.close()
+
+    assert writer.stats["failed"] == 0
+    with Session() as session:
+        assert session.query(FlightSearch).count() == 0
+        assert session.query(FlightResult).count() == 0
+        bucket = session.query(PriceHistory).one()
+        assert (bucket.origin, bucket.destination, bucket.cabin_class) == ("YYZ", "YVR", "ECONOMY")
+        assert (bucket.min_price, bucket.max_price, bucket.sample_count) == (95.0, 120.0, 2)
+
+
+def test_user_search_writes_search_results_and_history(tmp_path):
+    writer, Session = make_writer(tmp_path)
+    assert writer.submit(search_fields(1), [make_offer(120.0)], cabin_class="ECONOMY")
+    assert writer.submit(search_fields(None), [make_offer(80.0)], cabin_class="ECONOMY")
+    writer.close()
+
+    assert writer.stats["failed"] == 0
+    with Session() as session:
+        assert session.query(FlightSearch).count() == 1
+        assert session.query(FlightResult).count() == 1
+        bucket = session.query(PriceHistory).one()
+        assert (bucket.min_price, bucket.sample_count) == (80.0, 2)
+
+
+def test_invalid_jobs_are_rejected_before_batching(tmp_path):
+    writer, Session = make_writer(tmp_path)
+    incomplete = dict(search_fields(1), origin=None)
+    assert not writer.submit(incomplete, [make_offer(100.0)], cabin_class="ECONOMY")
+    assert not writer.submit(search_fields(None), [], cabin_class="ECONOMY")
+    for _ in range(3):
+        assert writer.submit(search_fields(1), [make_offer(100.0)], cabin_class="ECONOMY")
+    writer.close()
+
+    assert writer.stats["rejected"] == 1
+    assert (writer.stats["written"], writer.stats["failed"], writer.stats["batches"]) == (3, 0, 1)
+    with Session() as session:
+        assert session.query(FlightSearch).count() == 3
@@ -1,5 +1,7 @@
 from sqlalchemy.orm import sessionmaker
-from create_db import engine, User
+from create_db import engine, init_db, User
+
+init_db()
 
 # Create a new session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,170 @@
+"""
+Write-behind persistence for FlightSearch/FlightResult rows and price history.
+
+The search handler hands each finished search to search_writer.submit() and
+returns immediately. A background thread drains the bounded queue and writes
+searches in batches (one transaction per batch), flushing when BATCH_SIZE jobs
+are waiting or FLUSH_INTERVAL seconds have passed. Pending jobs are drained on
+interpreter shutdown. Anonymous searches (no user_id) have no flight_search row,
+but their prices still go into the price history.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+
+from create_db import FlightSearch, SessionLocal
+from persistence import save_flight_results
+from price_history import record_prices
+
+QUEUE_MAX_SIZE = int(os.getenv("WRITE_QUEUE_MAX_SIZE", "1000"))
+BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "50"))
+FLUSH_INTERVAL = float(os.getenv("WRITE_FLUSH_INTERVAL", "1.0"))  # seconds
+REQUIRED_FIELDS = ("origin", "destination", "departure_date")
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """Background thread that batches search persistence off the request path."""
+
+    def __init__(self, session_factory, max_queue_size=QUEUE_MAX_SIZE,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"enqueued": 0, "written": 0, "failed": 0, "dropped": 0, "rejected": 0, "batches": 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def submit(self, search_fields, offers=(), cabin_class=None):
+        """Queues a FlightSearch (column dict) and its offers; never blocks the caller.
+
+        When cabin_class is given the offer prices also feed the hourly price history.
+        Anonymous searches (user_id None) only feed the price history. Returns False
+        when the search was not queued.
+        """
+        offers = list(offers)
+        history = (cabin_class, offers[0].currency, [offer.price for offer in offers]) \
+            if cabin_class and offers else None
+        return self._enqueue(search_fields, offers, history)
+
+    def submit_prices(self, origin, destination, departure_date, cabin_class, currency, prices):
+        """Queues one upstream response's prices for the hourly price history only."""
+        prices = list(prices)
+        if not prices:
+            return False
+        route = {"user_id": None, "origin": origin, "destination": destination, "departure_date": departure_date}
+        return self._enqueue(route, [], (cabin_class, currency, prices))
+
+    def _enqueue(self, search_fields, offers, history):
+        if self._closed:
+            raise RuntimeError("write-behind writer is closed")
+        # ✅ Rejected here, so a bad job never rolls back (and un-batches) everyone else's writes
+        missing = [name for name in REQUIRED_FIELDS if search_fields.get(name) is None]
+        if missing:
+            with self._lock:
+                self.stats["rejected"] += 1
+            print(f"⚠️ Not saving search, missing {', '.join(missing)}")
+            return False
+        if search_fields.get("user_id") is None and not history:
+            return False  # anonymous and nothing for the price history: nothing to write
+        self.start()
+        try:
+            self._queue.put_nowait((search_fields, offers, history))
+        except queue.Full:
+            with self._lock:
+                self.stats["dropped"] += 1
+            print(f"⚠️ Write queue full ({self._queue.maxsize}), dropping search for "
+                  f"{search_fields.get('origin')}→{search_fields.get('destination')}")
+            return False
+        with self._lock:
+            self.stats["enqueued"] += 1
+        return True
+
+    def queue_depth(self):
+        """Number of searches waiting to be written."""
+        return self._queue.qsize()
+
+    def close(self, timeout=10.0):
+        """Stops accepting work and waits for queued searches to be written."""
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = None
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0) if batch else None)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+            if batch:
+                self._flush(batch)
+            if stop:
+                return
+
+    def _write(self, session, jobs):
+        for search_fields, offers, history in jobs:
+            # flight_search.user_id is NOT NULL, so anonymous searches only feed the price history
+            if search_fields.get("user_id") is not None:
+                flight_search = FlightSearch(**search_fields)
+                session.add(flight_search)
+                session.flush()  # ✅ Assigns search_id for the results
+                save_flight_results(session, flight_search.search_id, offers)
+            if history:
+                cabin_class, currency, prices = history
+                record_prices(session, search_fields["origin"], search_fields["destination"],
+                              search_fields["departure_date"], cabin_class, currency, prices)
+
+    def _flush(self, batch):
+        self.stats["batches"] += 1
+        session = self.session_factory()
+        try:
+            self._write(session, batch)
+            session.commit()
+            self.stats["written"] += len(batch)
+            return
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Batch write failed ({e}); retrying searches one by one")
+        finally:
+            session.close()
+
+        # One bad search shouldn't lose the rest of the batch
+        for job in batch:
+            session = self.session_factory()
+            try:
+                self._write(session, [job])
+                session.commit()
+                self.stats["written"] += 1
+            except Exception as e:
+                session.rollback()
+                self.stats["failed"] += 1
+                print(f"❌ Failed to save search: {e}")
+            finally:
+                session.close()
+
+
+# ✅ Process-wide writer shared by every Streamlit session
+search_writer = WriteBehindWriter(SessionLocal)
+atexit.register(search_writer.close)